@@ -0,0 +1,371 @@
+import sys, os, io, json, math, time, random, itertools, platform, tempfile, statistics, tracemalloc, contextlib
+import generator
+import renderer
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def helpMessage():
+    print(f'''
+    │--Required Field--│ │-------Optional Fields-------│
+    python {os.path.basename(__file__)} [benchmark] [valueCount|modelFolder] [repeats] [--options]
+
+    Benchmarks:
+      bitpack = bulk bitpack_values/bitunpack_values against the per-value _bitpack/_bitunpack
+      codecs  = ratio and decode MB/s of every compression id on the packed blocks of each model in modelFolder
+      suite   = every encode/decode stage on modelFolder plus synthetic meshes: MB/s, peak memory and ratio as JSON
+
+    Suite options:
+      --triangles N,N,...  = synthetic grid meshes to add, in triangles (default 1000000, 0 = none); cached in {SYNTHETIC_DIR}
+      --output FILE        = write the JSON report to FILE
+      --baseline FILE      = compare against an earlier report; exits with status 1 on regressions
+      --threshold R        = allowed relative MB/s drop and peak memory growth (default {SUITE_THRESHOLDS["mb_per_s"]})
+    ''')
+    sys.exit(1)
+
+
+def best_time(func, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def throughput(byte_count, seconds):
+    return byte_count / (1024 * 1024) / seconds if seconds > 0 else float('inf')
+
+
+def benchmark_bitpack(value_count: int = 1_000_000, repeats: int = 3, widths=(1, 4, 8, 11, 12, 14, 16, 17, 24, 32)):
+    """Packs and unpacks value_count random values per width; MB/s is measured on the packed size.
+
+    The bulk codec is fed a NumPy array when NumPy is installed, as it is inside pack_vertices/pack_faces.
+    """
+    rng = random.Random(0)
+    results = []
+    print(f'Bit-packing {value_count} values (NumPy {"enabled" if generator.np is not None else "missing"})')
+    print(f'{"bits":>4} | {"_bitpack":>12} | {"bitpack_values":>14} | {"_bitunpack":>12} | {"bitunpack_values":>16}')
+    for bits in widths:
+        values = [rng.getrandbits(bits) for _ in range(value_count)]
+        bulk_values = generator.np.asarray(values, dtype=generator.np.int64) if generator.np is not None else values
+        old_pack_time, packed = best_time(lambda: generator._bitpack(values, bits), repeats)
+        new_pack_time, new_packed = best_time(lambda: generator.bitpack_values(bulk_values, bits), repeats)
+        old_unpack_time, _ = best_time(lambda: renderer._bitunpack(packed, bits, value_count), repeats)
+        new_unpack_time, unpacked = best_time(lambda: renderer.bitunpack_values(packed, bits, value_count), repeats)
+        if new_packed != packed or list(unpacked) != values:
+            raise RuntimeError(f'Bulk bit-packing codec does not round-trip at {bits} bits')
+        row = {
+            'bits': bits,
+            '_bitpack MB/s': throughput(len(packed), old_pack_time),
+            'bitpack_values MB/s': throughput(len(packed), new_pack_time),
+            '_bitunpack MB/s': throughput(len(packed), old_unpack_time),
+            'bitunpack_values MB/s': throughput(len(packed), new_unpack_time),
+        }
+        print(f'{bits:>4} | {row["_bitpack MB/s"]:>9.1f} MB/s | {row["bitpack_values MB/s"]:>11.1f} MB/s | {row["_bitunpack MB/s"]:>9.1f} MB/s | {row["bitunpack_values MB/s"]:>13.1f} MB/s')
+        results.append(row)
+    return results
+
+
+CODEC_NAMES = {1: 'bz2', 2: 'lz4', 3: 'zstd', 4: 'zlib', 5: 'lzma', 7: 'rans'}
+
+
+def model_blocks(model_folder: str):
+    """Yields (label, block) for the lossless, quantized and face blocks of every model in model_folder."""
+    for file_name in sorted(os.listdir(model_folder)):
+        if os.path.splitext(file_name)[1].lower() not in {'.obj', '.ply', '.stl'}:
+            continue
+        (vertices, faces), _ = generator.parse_model(os.path.join(model_folder, file_name))
+        vertices, faces = generator.optimize_mesh_pipeline(vertices, faces)
+        yield f'{file_name} vertices', generator.pack_vertices(vertices, 'lossless')
+        yield f'{file_name} quantized', generator.pack_vertices(vertices, 'quantized', 14)
+        yield f'{file_name} faces', generator.pack_faces(faces, len(vertices))
+
+
+def benchmark_codecs(model_folder: str = 'objectModels', repeats: int = 3):
+    """Compresses every block with each available codec; ratio is raw/stored, MB/s is measured on the raw size."""
+    codecs = [codec for codec in generator.COMPRESSOR_IDS if codec in CODEC_NAMES]
+    codecs = [codec for codec in codecs if not (codec == 2 and generator.lz4_block is None) and not (codec == 3 and generator.zstandard is None)]
+    totals = {codec: [0, 0, 0.0] for codec in codecs}
+    results = []
+    print(f'Codecs on {model_folder} (NumPy {"enabled" if generator.np is not None else "missing"})')
+    print(f'{"block":<28} | {"bytes":>9} | ' + ' | '.join(f'{CODEC_NAMES[codec]:>17}' for codec in codecs))
+    for label, block in model_blocks(model_folder):
+        cells = []
+        for codec in codecs:
+            stored = generator.compress_with_mode(block, codec)
+            seconds, decoded = best_time(lambda: renderer.decompressor(stored, codec), repeats)
+            if decoded != block:
+                raise RuntimeError(f'Compression mode {codec} does not round-trip {label}')
+            totals[codec][0] += len(block)
+            totals[codec][1] += len(stored)
+            totals[codec][2] += seconds
+            results.append({'block': label, 'codec': CODEC_NAMES[codec], 'ratio': len(block) / len(stored), 'decode MB/s': throughput(len(block), seconds)})
+            cells.append(f'{len(block) / len(stored):>5.2f}x {throughput(len(block), seconds):>6.1f} MB/s')
+        print(f'{label[:28]:<28} | {len(block):>9} | ' + ' | '.join(cells))
+    print(f'{"total":<28} | {totals[codecs[0]][0]:>9} | ' + ' | '.join(f'{raw / stored:>5.2f}x {throughput(raw, seconds):>6.1f} MB/s' for raw, stored, seconds in totals.values()))
+    return results
+
+
+SUITE_VERSION = 2
+SUITE_QUANT_BITS = (10, 12, 14, 16)
+SUITE_TRIANGLES = (1_000_000,)
+SUITE_THRESHOLDS = {'mb_per_s': 0.20, 'peak_mb': 0.10, 'ratio': 0.01}
+SUITE_ROUND_SECONDS = 0.05  # each timed round repeats a stage until it runs at least this long
+SUITE_PEAK_SLACK_MB = 0.25
+SYNTHETIC_DIR = os.path.join(tempfile.gettempdir(), 'bbm-benchmark')
+MB = 1024 * 1024
+
+
+def autorange(func, min_seconds=SUITE_ROUND_SECONDS):
+    """Like timeit's autorange: returns (calls, seconds) for the first of 1, 2, 5, 10, 20, ... calls of func that
+    takes at least min_seconds."""
+    for exponent in itertools.count():
+        for base in (1, 2, 5):
+            calls = base * 10 ** exponent
+            start = time.perf_counter()
+            for _ in range(calls):
+                func()
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_seconds:
+                return calls, elapsed
+
+
+def time_calls(func, calls):
+    """Returns (seconds per call, result) of calls back-to-back calls of func."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        result = func()
+    return (time.perf_counter() - start) / calls, result
+
+
+def measure(func):
+    """Returns (calls per round, seconds per call, result, peak bytes) for a stage's first round. Peak memory comes
+    from one extra tracemalloc run, so tracing never slows down the timed runs."""
+    tracemalloc.start()
+    try:
+        result = func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    calls, seconds = autorange(func)
+    return calls, seconds / calls, result, peak
+
+
+def mix32(value: int) -> int:
+    """32-bit integer hash (murmur3 finalizer), so synthetic meshes are reproducible without a seeded RNG."""
+    value = (value ^ (value >> 16)) * 0x85EBCA6B & 0xFFFFFFFF
+    value = (value ^ (value >> 13)) * 0xC2B2AE35 & 0xFFFFFFFF
+    return value ^ (value >> 16)
+
+
+def synthetic_height(col: int, row: int) -> float:
+    """Smooth terrain with a small hashed jitter."""
+    return math.sin(col * 0.05) * math.cos(row * 0.07) * 4.0 + mix32(col << 16 ^ row) / 0xFFFFFFFF * 0.01
+
+
+def synthetic_obj(triangle_count: int, directory: str = SYNTHETIC_DIR) -> str:
+    """Writes (once) a square height-field grid of about triangle_count triangles as .obj and returns its path.
+
+    Each quad is split along a hashed diagonal so the connectivity is not perfectly regular.
+    """
+    path = os.path.join(directory, f'grid_{triangle_count}_v{SUITE_VERSION}.obj')
+    if os.path.exists(path):
+        return path
+    os.makedirs(directory, exist_ok=True)
+    side = max(2, math.isqrt(triangle_count // 2) + 1)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        for row in range(side):
+            f.write(''.join(f'v {col * 0.1:.6f} {row * 0.1:.6f} {synthetic_height(col, row):.6f}\n' for col in range(side)))
+        for row in range(side - 1):
+            first = row * side + 1
+            f.write(''.join(f'f {a} {a + 1} {a + side + 1}\nf {a} {a + side + 1} {a + side}\n' if mix32(a) & 1 else
+                            f'f {a} {a + 1} {a + side}\nf {a + 1} {a + side + 1} {a + side}\n' for a in range(first, first + side - 1)))
+    os.replace(temp_path, path)
+    return path
+
+
+def suite_inputs(model_folder: str, triangle_counts):
+    inputs = [(file_name, os.path.join(model_folder, file_name)) for file_name in sorted(os.listdir(model_folder))
+              if os.path.splitext(file_name)[1].lower() in {'.obj', '.ply', '.stl'}]
+    return inputs + [(f'grid_{count}', synthetic_obj(count)) for count in triangle_counts if count > 0]
+
+
+def optimize_stage(vertices, faces):
+    if generator.np is not None:
+        return generator.optimize_mesh_array(vertices, faces)
+    return generator.optimize_mesh(vertices, faces)
+
+
+def reorder_stage(vertices, faces):
+    if generator.np is not None:
+        vertices, faces = generator.reorder_vertices_for_locality_array(vertices, faces)
+        return vertices, generator.reorder_faces_for_locality_array(faces)
+    vertices, faces = generator.reorder_vertices_for_locality(vertices, faces)
+    return vertices, generator.reorder_faces_for_locality(faces)
+
+
+def suite_codecs():
+    codecs = [codec for codec in generator.COMPRESSOR_IDS if codec in CODEC_NAMES]
+    return [codec for codec in codecs if not (codec == 2 and generator.lz4_block is None) and not (codec == 3 and generator.zstandard is None)]
+
+
+def benchmark_stages(label: str, path: str, timings, quant_bits=SUITE_QUANT_BITS):
+    """Runs parse -> optimize -> reorder -> pack -> compress -> decompress -> unpack on one model, adding one timed
+    round per stage to timings.
+
+    timings maps '<label>/<stage>' to {'bytes_in', 'calls', 'times', 'peak_mb'[, 'bytes_out']}; a stage's first
+    round also records its peak memory and how many calls make a round (see autorange). Sizes are each stage's
+    input (float32/uint32 size for meshes) and output.
+    """
+    def run(stage, func, bytes_in, output_size=None):
+        key = f'{label}/{stage}'
+        with contextlib.redirect_stdout(io.StringIO()):
+            if key in timings:
+                seconds, result = time_calls(func, timings[key]['calls'])
+            else:
+                calls, seconds, result, peak = measure(func)
+                timings[key] = {'bytes_in': bytes_in, 'calls': calls, 'times': [], 'peak_mb': peak / MB}
+                if output_size is not None:
+                    timings[key]['bytes_out'] = output_size(result)
+        timings[key]['times'].append(seconds)
+        return result
+
+    (vertices, faces), _ = run('parse', lambda: generator.parse_model(path), os.path.getsize(path))
+    vertices, faces = run('optimize', lambda: optimize_stage(vertices, faces), 12 * (len(vertices) + len(faces)))
+    vertices, faces = run('reorder', lambda: reorder_stage(vertices, faces), 12 * (len(vertices) + len(faces)))
+    vertex_bytes, face_bytes = 12 * len(vertices), 12 * len(faces)
+    blocks = {'lossless': run('pack_vertices/lossless', lambda: generator.pack_vertices(vertices, 'lossless'), vertex_bytes, len)}
+    for bits in quant_bits:
+        blocks[f'quantized-{bits}'] = run(f'pack_vertices/quantized-{bits}', lambda: generator.pack_vertices(vertices, 'quantized', bits), vertex_bytes, len)
+    blocks['faces'] = run('pack_faces', lambda: generator.pack_faces(faces, len(vertices)), face_bytes, len)
+
+    compressed_blocks = ['lossless', f'quantized-{14 if 14 in quant_bits else quant_bits[0]}', 'faces'] if quant_bits else ['lossless', 'faces']
+    for name in compressed_blocks:
+        block = blocks[name]
+        for codec in suite_codecs():
+            stored = run(f'compress/{name}/{CODEC_NAMES[codec]}', lambda: generator.compress_with_mode(block, codec), len(block), len)
+            decoded = run(f'decompress/{name}/{CODEC_NAMES[codec]}', lambda: renderer.decompressor(stored, codec), len(block))
+            if decoded != block:
+                raise RuntimeError(f'Compression mode {codec} does not round-trip {label} {name}')
+    for name, block in blocks.items():
+        if name == 'faces':
+            run('unpack_faces', lambda: renderer.unpack_faces_array(block), face_bytes)
+        else:
+            run(f'unpack_vertices/{name}', lambda: renderer.unpack_vertices_array(block, len(vertices)), vertex_bytes)
+
+
+def stage_row(timing):
+    """Report metrics of one stage: median seconds per call over the rounds, spread = (slowest - fastest round) /
+    median, MB/s of the median and ratio = input/output bytes."""
+    seconds = statistics.median(timing['times'])
+    row = {'seconds': seconds, 'spread': (max(timing['times']) - min(timing['times'])) / seconds if seconds > 0 else 0.0,
+           'mb_per_s': throughput(timing['bytes_in'], seconds), 'peak_mb': timing['peak_mb'], 'bytes_in': timing['bytes_in']}
+    if 'bytes_out' in timing:
+        row.update(bytes_out=timing['bytes_out'], ratio=timing['bytes_in'] / max(timing['bytes_out'], 1))
+    return row
+
+
+def environment():
+    modules = {'numpy': generator.np, 'zstandard': generator.zstandard}
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        **{name: getattr(module, '__version__', None) if module is not None else None for name, module in modules.items()},
+        'lz4': generator.lz4_block is not None,
+    }
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        info['max_rss_mb'] = max_rss / MB if sys.platform == 'darwin' else max_rss / 1024
+    return info
+
+
+def compare_with_baseline(results, baseline_results, thresholds=SUITE_THRESHOLDS):
+    """Lists stages that got slower, used more peak memory or compress worse than the baseline beyond thresholds.
+
+    The MB/s threshold is widened by the larger round-to-round spread of the two runs, so noisy stages need a
+    bigger drop to count.
+    """
+    regressions = []
+    for key, row in results.items():
+        base = baseline_results.get(key)
+        if base is None:
+            continue
+        margin = thresholds['mb_per_s'] + max(row.get('spread', 0.0), base.get('spread', 0.0))
+        if row['mb_per_s'] * (1 + margin) < base['mb_per_s']:
+            regressions.append({'stage': key, 'metric': 'mb_per_s', 'baseline': base['mb_per_s'], 'current': row['mb_per_s']})
+        if row['peak_mb'] > base['peak_mb'] * (1 + thresholds['peak_mb']) + SUITE_PEAK_SLACK_MB:
+            regressions.append({'stage': key, 'metric': 'peak_mb', 'baseline': base['peak_mb'], 'current': row['peak_mb']})
+        if 'ratio' in row and 'ratio' in base and row['ratio'] < base['ratio'] * (1 - thresholds['ratio']):
+            regressions.append({'stage': key, 'metric': 'ratio', 'baseline': base['ratio'], 'current': row['ratio']})
+    return regressions
+
+
+def benchmark_suite(model_folder: str = 'objectModels', repeats: int = 3, triangle_counts=SUITE_TRIANGLES, output: str = None, baseline: str = None, threshold: float = None):
+    """Benchmarks every stage on the models of model_folder plus synthetic grids; returns the JSON report.
+
+    Each of the repeats rounds runs every stage of every input once, so a slow spell of the machine only skews one
+    round of the stages it overlaps. With baseline, report['regressions'] lists stages beyond the thresholds
+    (threshold overrides the MB/s and peak memory ones); stages missing from either report are skipped.
+    """
+    print(f'Suite on {model_folder} + synthetic {[count for count in triangle_counts if count > 0]} triangles (NumPy {"enabled" if generator.np is not None else "missing"}, median of {repeats} rounds)')
+    inputs = suite_inputs(model_folder, triangle_counts)
+    timings = {}
+    for round_number in range(1, repeats + 1):
+        print(f'Round {round_number}/{repeats}')
+        for label, path in inputs:
+            benchmark_stages(label, path, timings)
+    print(f'{"stage":<52} | {"time":>13} | {"throughput":>13} | {"spread":>6} | {"peak":>11} | ratio')
+    results = {}
+    for key, timing in timings.items():
+        row = results[key] = stage_row(timing)
+        ratio = f'{row["ratio"]:>7.2f}x' if 'ratio' in row else ''
+        print(f'{key:<52} | {row["seconds"] * 1000:>10.2f} ms | {row["mb_per_s"]:>8.1f} MB/s | {row["spread"]:>5.0%} | {row["peak_mb"]:>8.1f} MB | {ratio}')
+    report = {'version': SUITE_VERSION, 'repeats': repeats, 'environment': environment(), 'results': results}
+    if baseline is not None:
+        with open(baseline) as f:
+            baseline_report = json.load(f)
+        thresholds = dict(SUITE_THRESHOLDS, **({'mb_per_s': threshold, 'peak_mb': threshold} if threshold is not None else {}))
+        report['regressions'] = compare_with_baseline(results, baseline_report['results'], thresholds)
+        changed = [name for name in ('python', 'numpy', 'zstandard', 'lz4', 'machine') if baseline_report['environment'].get(name) != report['environment'].get(name)]
+        if baseline_report.get('version') != SUITE_VERSION:
+            changed.append('suite version')
+        if changed:
+            print(f'Baseline was recorded with a different {", ".join(changed)}; comparisons may not be meaningful')
+        for regression in report['regressions']:
+            print(f'REGRESSION {regression["stage"]} {regression["metric"]}: {regression["baseline"]:.3f} -> {regression["current"]:.3f}')
+        print(f'{len(report["regressions"])} regressions against {baseline}')
+    if output is not None:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=4)
+    return report
+
+
+BENCHMARKS = {
+    'bitpack': lambda valueCount=1_000_000, repeats=3: benchmark_bitpack(int(valueCount), int(repeats)),
+    'codecs': lambda modelFolder='objectModels', repeats=3: benchmark_codecs(modelFolder, int(repeats)),
+    'suite': lambda modelFolder='objectModels', repeats=3, triangles=None, output=None, baseline=None, threshold=None: benchmark_suite(
+        modelFolder, int(repeats), SUITE_TRIANGLES if triangles is None else [int(count) for count in triangles.split(',')],
+        output, baseline, float(threshold) if threshold is not None else None),
+}
+BENCHMARK_OPTIONS = {'bitpack': {}, 'codecs': {}, 'suite': {'triangles': 1, 'output': 1, 'baseline': 1, 'threshold': 1}}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        helpMessage()
+    try:
+        args, options = generator.parseOptions(sys.argv[2:], BENCHMARK_OPTIONS[sys.argv[1]])
+    except ValueError as exc:
+        print(f'{exc} for {sys.argv[1]}')
+        helpMessage()
+    result = BENCHMARKS[sys.argv[1]](*args[:2], **options)
+    if isinstance(result, dict) and result.get('regressions'):
+        sys.exit(1)
@@ -1,4 +1,4 @@
-import sys, lzma, bz2, zlib, struct, os, json, math
+import sys, lzma, bz2, zlib, struct, os, json, math, time, warnings, itertools, threading, hashlib, concurrent.futures
 
 try:
     import lz4.block as lz4_block
@@ -10,6 +10,11 @@ try:
 except ImportError:
     zstandard = None
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 try:
     from Crypto.Cipher import AES, Blowfish, ChaCha20
     from Crypto.Random import get_random_bytes
@@ -20,10 +25,33 @@ except ImportError:
     pad = None
 
 encryptionList = ['aes', 'xor', 'chacha', 'blowfish']
-COMPRESSOR_IDS = [0, 1, 2, 3, 4, 5]
+COMPRESSOR_IDS = [0, 1, 2, 3, 4, 5, 7]
 HEADER_STRUCT = struct.Struct('<4sIIHHQQ16s')
 HEADER_SIZE = HEADER_STRUCT.size
 
+DIRECTORY_MAGIC = b'BBMD'
+DIRECTORY_FOOTER_MAGIC = b'BBMF'
+DIRECTORY_VERSION = 1
+DIRECTORY_HEADER_STRUCT = struct.Struct('<4sHHI')
+DIRECTORY_ENTRY_STRUCT = struct.Struct('<QQIIH16s')
+DIRECTORY_FOOTER_STRUCT = struct.Struct('<QQ4s')
+DIRECTORY_FLAG_ZSTD_DICT = 0x0001
+ZSTD_DICT_MODE = 8
+ZSTD_LEVEL = 19
+ZSTD_DICT_SIZE = 112640
+ZSTD_DICT_SAMPLE_SIZE = 1 << 14
+ZSTD_DICT_SAMPLE_RATIO = 16
+ZSTD_DICT_MODEL_SAMPLES = 64
+ZSTD_DICT_TRAINING_MODELS = 32
+MANIFEST_VERSION = 1
+HEADER_COMPRESSION_OFFSET = 12
+HEADER_MODEL_COUNT_OFFSET = 14
+HEADER_NAME_OFFSET = 32
+ARCHIVE_COMMANDS = ['append', 'replace', 'delete', 'compact']
+# Command-line options and how many values each takes (0 = bare flag).
+COMMAND_OPTIONS = {'jobs': 1, 'auto-strategy': 1, 'auto-top': 1, 'chunk-size': 1, 'face-order': 1, 'max-error': 1, 'max-rel-error': 1, 'zstd-dict': 1, 'incremental': 0, 'dedup': 1}
+COPY_BUFFER_SIZE = 1 << 20
+
 VERT_FLOAT32 = 0
 VERT_FLOAT16 = 1
 VERT_FLOAT32_SHUFFLED = 2
@@ -32,6 +60,19 @@ VERT_FLOAT16_SHUFFLED = 3
 VERT_STREAM_FLOAT16 = 4
 VERT_STREAM_FLOAT32 = 5
 VERT_QUANTIZED = 6
+VERT_CHUNKED = 7
+VERT_PREDICTED = 8
+VERT_STREAM_FLOAT32_PREDICTED = 9
+VERT_QUANTIZED_AXES = 10
+QUANTIZED_AXES_HEADER_STRUCT = struct.Struct('<BBBBffffffIII')
+
+FLOAT_PREDICT_NONE = 0
+FLOAT_PREDICT_XOR = 1
+FLOAT_PREDICT_DELTA = 2
+
+PREDICT_PREVIOUS = 0
+PREDICT_PARALLELOGRAM = 1
+PREDICTED_HEADER_STRUCT = struct.Struct('<BBBffffffBBBIII')
 
 FACE_UINT32 = 0
 FACE_UINT16 = 1
@@ -40,6 +81,26 @@ FACE_DELTA_INT16 = 3
 
 FACE_BITPACKED = 4
 FACE_DELTA_VARINT = 5
+FACE_CHUNKED = 6
+FACE_TOPOLOGY = 7
+
+TOPOLOGY_NEW = 0
+TOPOLOGY_LEFT = 1
+TOPOLOGY_RIGHT = 2
+TOPOLOGY_ESCAPE = 3
+TOPOLOGY_STRUCT = struct.Struct('<BII')
+
+COMPRESSION_CODEC_MASK = 0x00FF
+COMPRESSION_CHUNKED = 0x0100
+COMPRESSION_VERTEX_REF = 0x1000
+COMPRESSION_FACE_REF = 0x2000
+COMPRESSION_TOMBSTONE = 0x8000
+BLOCK_REFERENCE_STRUCT = struct.Struct('<QQ')
+CHUNK_HEADER_STRUCT = struct.Struct('<BII')
+CHUNK_ENTRY_STRUCT = struct.Struct('<III')
+
+FACE_ORDERS = ['locality', 'cache', 'topology']
+VERTEX_CACHE_SIZE = 16
 
 def helpMessage():
     print(f'''
@@ -54,13 +115,38 @@ def helpMessage():
       4 = zlib
       5 = lzma
       6 = auto-pick smallest packed result
+      7 = rans (built-in entropy coder, no third-party packages)
+      8 = zstd with a dictionary trained on all models of a folder (stored once in the file)
 
     Vertex modes:
-      lossless  = exact restoration, stores split X/Y/Z streams (default)
+      lossless  = split X/Y/Z streams, float16 when the values fit (rounds), float32 otherwise (default)
       quantized = lossy integer grid inside mesh bounds for much smaller files
+      predicted = quantized grid stored as parallelogram-predicted residuals (smaller after compression)
+      exact     = bit-exact float32 split streams with XOR/delta prediction (never rounds to float16)
 
     Quant bits:
-      Used only when vertexMode=quantized. Valid range: 1-24. Good starting values: 12, 14, 16
+      Used only when vertexMode=quantized/predicted. Valid range: 1-24. Good starting values: 12, 14, 16
+      With --max-error/--max-rel-error, quantized mode picks the bits per axis instead
+
+    Options:
+      --jobs N               = compile up to N models of a folder in parallel worker processes (0 = one per CPU, default 1)
+      --auto-strategy sample = mode 6 ranks codecs on samples of large blocks before compressing in full (default full)
+      --auto-top N           = with --auto-strategy sample, fully compress only the N best predicted codecs (default 2)
+      --chunk-size N         = split vertex/face streams into independently compressed N-element chunks (default off)
+      --face-order MODE      = locality (sorted faces, default), cache (Tipsify vertex-cache order for GPU reuse)
+                               or topology (connectivity-coded faces, about 2 bits per triangle on manifold meshes)
+      --max-error E          = quantized mode: fewest bits per axis keeping every decoded coordinate within E
+      --max-rel-error R      = same, with E = R * bounding box diagonal (e.g. 0.0001)
+      --zstd-dict N          = folders: train an N-byte zstd dictionary on all models for mode 8 (mode 6 tries it too)
+      --incremental          = folders: keep <output>.manifest.json and only re-encode models whose source changed
+      --dedup false          = folders: store identical models/blocks in full instead of as references (default on)
+
+    Editing an existing file (model = name or directory index; options above apply to the new record):
+      python {os.path.basename(__file__)} append  [bbmFile] [inputModel] [compressionMode] [encryptionMode] [encryptionKey] [vertexMode] [quantBits]
+      python {os.path.basename(__file__)} replace [bbmFile] [model] [inputModel] [compressionMode] [encryptionMode] [encryptionKey] [vertexMode] [quantBits]
+      python {os.path.basename(__file__)} delete  [bbmFile] [model]
+      python {os.path.basename(__file__)} compact [bbmFile] [outputBbmFile]
+      Replaced and deleted records stay in the file as tombstones until compact rewrites it
     ''')
     sys.exit(1)
 
@@ -95,7 +181,28 @@ def encryptor(byteData: bytes, encryptionKey: str = None, encryptionMode: str =
     return bytes([byteData[i] ^ key_bytes[i % key_length] for i in range(len(byteData))])
 
 
-def compress_with_mode(byteData: bytes, compression: int = 0) -> bytes:
+zstd_contexts = threading.local()
+
+
+def zstd_compressor(zstd_dict: bytes = None):
+    """Per-thread ZstdCompressor for ZSTD_LEVEL and an optional raw dictionary, built once and reused."""
+    cache = zstd_contexts.__dict__.setdefault('compressors', {})
+    compressor = cache.get(zstd_dict)
+    if compressor is None:
+        dict_data = None
+        if zstd_dict is not None:
+            dict_data = zstandard.ZstdCompressionDict(zstd_dict)
+            dict_data.precompute_compress(level=ZSTD_LEVEL)
+        compressor = cache[zstd_dict] = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dict_data)
+    return compressor
+
+
+def compressor_modes(zstd_dict: bytes = None):
+    """Codecs tried by mode 6; the shared-dictionary zstd only when a dictionary was trained."""
+    return COMPRESSOR_IDS + [ZSTD_DICT_MODE] if zstd_dict is not None else list(COMPRESSOR_IDS)
+
+
+def compress_with_mode(byteData: bytes, compression: int = 0, zstd_dict: bytes = None) -> bytes:
     if compression == 0:
         return byteData
     if compression == 1:
@@ -107,30 +214,253 @@ def compress_with_mode(byteData: bytes, compression: int = 0) -> bytes:
     if compression == 3:
         if zstandard is None:
             return byteData
-        cctx = zstandard.ZstdCompressor(level=19)
-        return cctx.compress(byteData)
+        return zstd_compressor().compress(byteData)
     if compression == 4:
         return zlib.compress(byteData, 9)
     if compression == 5:
         return lzma.compress(byteData)
+    if compression == 7:
+        return rans_encode(byteData)
+    if compression == ZSTD_DICT_MODE:
+        if zstandard is None or zstd_dict is None:
+            raise RuntimeError('Compression mode 8 needs zstandard and a trained dictionary (folder builds only).')
+        return zstd_compressor(zstd_dict).compress(byteData)
     return byteData
 
 
-def choose_best_compression(vertex_block: bytes, face_block: bytes, compression: int):
+RANS_PROB_BITS = 12
+RANS_PROB_SCALE = 1 << RANS_PROB_BITS
+RANS_LOW = 1 << 16
+RANS_SEGMENT_BASE = 4096
+RANS_SYMBOLS_PER_LANE = 512
+RANS_MAX_LANES = 1024
+RANS_LIST_TABLE_MAX = 64
+
+
+def rans_histogram_cost(counts):
+    """Estimated bytes for coding a segment with these byte counts: order-0 entropy plus its frequency table."""
+    total = sum(counts)
+    present = [count for count in counts if count]
+    bits = sum(count * math.log2(total / count) for count in present)
+    table = 1 + (2 * len(present) if len(present) <= RANS_LIST_TABLE_MAX else 32 + 1.5 * len(present))
+    return bits / 8 + table
+
+
+def rans_segments(data: bytes):
+    """Splits data into segments with their own frequency tables: RANS_SEGMENT_BASE-byte pieces are merged
+    left to right while one shared table is estimated to be cheaper. Returns [(length, counts), ...]."""
+    if np is not None:
+        raw = np.frombuffer(data, dtype=np.uint8)
+        piece_count = -(-len(raw) // RANS_SEGMENT_BASE)
+        piece_of = np.arange(len(raw), dtype=np.int64) // RANS_SEGMENT_BASE
+        histograms = np.bincount(piece_of * 256 + raw, minlength=piece_count * 256).reshape(piece_count, 256).tolist()
+    else:
+        histograms = []
+        for start in range(0, len(data), RANS_SEGMENT_BASE):
+            counts = [0] * 256
+            for byte in data[start:start + RANS_SEGMENT_BASE]:
+                counts[byte] += 1
+            histograms.append(counts)
+    segments = []
+    current = None
+    current_cost = 0.0
+    for counts in histograms:
+        if current is not None:
+            merged = [a + b for a, b in zip(current, counts)]
+            merged_cost = rans_histogram_cost(merged)
+            if merged_cost <= current_cost + rans_histogram_cost(counts):
+                current, current_cost = merged, merged_cost
+                continue
+            segments.append(current)
+        current, current_cost = counts, rans_histogram_cost(counts)
+    segments.append(current)
+    return [(sum(counts), counts) for counts in segments]
+
+
+def rans_normalize(counts):
+    """Scales byte counts to frequencies summing to RANS_PROB_SCALE, keeping every present symbol at >= 1."""
+    total = sum(counts)
+    freqs = [max(1, count * RANS_PROB_SCALE // total) if count else 0 for count in counts]
+    by_size = sorted(range(256), key=lambda symbol: (-freqs[symbol], symbol))
+    surplus = sum(freqs) - RANS_PROB_SCALE
+    if surplus < 0:
+        freqs[by_size[0]] -= surplus
+    while surplus > 0:
+        for symbol in by_size:
+            if surplus == 0 or freqs[symbol] <= 1:
+                break
+            freqs[symbol] -= 1
+            surplus -= 1
+    return freqs
+
+
+def rans_table_bytes(freqs):
+    present = [symbol for symbol in range(256) if freqs[symbol]]
+    out = bytearray([len(present) - 1])
+    if len(present) <= RANS_LIST_TABLE_MAX:
+        for symbol in present:
+            out.append(symbol)
+            out += encode_varints([freqs[symbol] - 1])
+        return bytes(out)
+    bitmap = bytearray(32)
+    for symbol in present:
+        bitmap[symbol >> 3] |= 1 << (symbol & 7)
+    return bytes(out + bitmap) + encode_varints([freqs[symbol] - 1 for symbol in present])
+
+
+def rans_encode(data: bytes) -> bytes:
+    """Static-model rANS (compression id 7): 32-bit states with 16-bit renormalization and 12-bit frequencies.
+
+    Symbol i is coded by lane i % lanes so NumPy can advance all lanes of a step at once. Layout:
+    [raw length][lanes][segment count][(length, table) per segment] as varints/tables, then the final
+    lane states (uint32) and the renormalization words (uint16) in decode order.
+    """
+    if not data:
+        return encode_varints([0])
+    segments = rans_segments(data)
+    freqs = [rans_normalize(counts) for _, counts in segments]
+    cums = [[0, *itertools.accumulate(table[:255])] for table in freqs]
+    lanes = max(1, min(RANS_MAX_LANES, len(data) // RANS_SYMBOLS_PER_LANE))
+    header = encode_varints([len(data), lanes, len(segments)])
+    header += b''.join(encode_varints([length]) + rans_table_bytes(table) for (length, _), table in zip(segments, freqs))
+    renorm_limit = RANS_LOW >> RANS_PROB_BITS << 16
+    if np is not None:
+        raw = np.frombuffer(data, dtype=np.uint8)
+        segment_of = np.repeat(np.arange(len(segments)), [length for length, _ in segments])
+        symbol_freq = np.asarray(freqs, dtype=np.uint64)[segment_of, raw]
+        symbol_cum = np.asarray(cums, dtype=np.uint64)[segment_of, raw]
+        states = np.full(lanes, RANS_LOW, dtype=np.uint64)
+        emitted = []
+        for start in range(((len(raw) - 1) // lanes) * lanes, -1, -lanes):
+            end = min(start + lanes, len(raw))
+            x = states[:end - start]
+            freq = symbol_freq[start:end]
+            renorm = x >= freq * np.uint64(renorm_limit)
+            if renorm.any():
+                emitted.append((x[renorm] & np.uint64(0xFFFF))[::-1])
+                x[renorm] >>= np.uint64(16)
+            states[:end - start] = ((x // freq) << np.uint64(RANS_PROB_BITS)) + (x % freq) + symbol_cum[start:end]
+        words = np.concatenate(emitted)[::-1].astype('<u2').tobytes() if emitted else b''
+        return header + states.astype('<u4').tobytes() + words
+    segment_of = [segment for segment, (length, _) in enumerate(segments) for _ in range(length)]
+    states = [RANS_LOW] * lanes
+    words = []
+    for i in range(len(data) - 1, -1, -1):
+        lane = i % lanes
+        segment = segment_of[i]
+        freq = freqs[segment][data[i]]
+        x = states[lane]
+        if x >= freq * renorm_limit:
+            words.append(x & 0xFFFF)
+            x >>= 16
+        states[lane] = ((x // freq) << RANS_PROB_BITS) + (x % freq) + cums[segment][data[i]]
+    words.reverse()
+    return header + struct.pack(f'<{lanes}I', *states) + struct.pack(f'<{len(words)}H', *words)
+
+
+AUTO_SAMPLE_THRESHOLD = 1 << 20
+AUTO_SAMPLE_COUNT = 8
+AUTO_SAMPLE_SIZE = 1 << 16
+
+
+def timed_compress(byteData: bytes, compression: int, zstd_dict: bytes = None):
+    start = time.perf_counter()
+    compressed = compress_with_mode(byteData, compression, zstd_dict)
+    return compressed, time.perf_counter() - start
+
+
+def run_compression_trials(blocks, modes, workers=None, zstd_dict: bytes = None):
+    """Compresses every block with every mode on a thread pool (the codecs release the GIL).
+
+    Returns {mode: ([compressed block, ...], seconds spent on that mode)}.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers or len(modes) * len(blocks)) as executor:
+        futures = {mode: [executor.submit(timed_compress, block, mode, zstd_dict) for block in blocks] for mode in modes}
+        results = {}
+        for mode, mode_futures in futures.items():
+            outcomes = [future.result() for future in mode_futures]
+            results[mode] = ([compressed for compressed, _ in outcomes], sum(seconds for _, seconds in outcomes))
+    return results
+
+
+def sample_block(block: bytes) -> bytes:
+    """Evenly spaced AUTO_SAMPLE_COUNT x AUTO_SAMPLE_SIZE slices of a large block (small blocks are returned whole)."""
+    if len(block) <= AUTO_SAMPLE_THRESHOLD:
+        return block
+    step = (len(block) - AUTO_SAMPLE_SIZE) // (AUTO_SAMPLE_COUNT - 1)
+    return b''.join(block[i * step:i * step + AUTO_SAMPLE_SIZE] for i in range(AUTO_SAMPLE_COUNT))
+
+
+def choose_best_compression(vertex_block: bytes, face_block: bytes, compression: int, auto_strategy: str = 'full', auto_top: int = 2, zstd_dict: bytes = None):
+    """Mode 6 tries every codec; auto_strategy='sample' ranks codecs on samples of large blocks first and
+    fully compresses only the auto_top best predictions."""
     if compression != 6:
-        return compression, compress_with_mode(vertex_block, compression), compress_with_mode(face_block, compression)
+        return compression, compress_with_mode(vertex_block, compression, zstd_dict), compress_with_mode(face_block, compression, zstd_dict)
+
+    started = time.perf_counter()
+    blocks = (vertex_block, face_block)
+    modes = compressor_modes(zstd_dict)
+    order = list(modes)
+    samples = [sample_block(block) for block in blocks]
+    if auto_strategy == 'sample' and any(sample is not block for sample, block in zip(samples, blocks)):
+        estimates = {}
+        for mode, (compressed, seconds) in run_compression_trials(samples, modes, zstd_dict=zstd_dict).items():
+            estimates[mode] = sum(len(c) * len(block) / max(len(sample), 1) for c, block, sample in zip(compressed, blocks, samples))
+            print(f'Auto compression estimate mode {mode}: ~{int(estimates[mode])} bytes (sampled in {seconds:.3f}s)')
+        modes = sorted(modes, key=lambda mode: (estimates[mode], order.index(mode)))[:max(1, auto_top)]
+        modes.sort(key=order.index)
 
     best = None
-    for mode in COMPRESSOR_IDS:
-        cverts = compress_with_mode(vertex_block, mode)
-        cfaces = compress_with_mode(face_block, mode)
+    for mode, ((cverts, cfaces), seconds) in run_compression_trials(blocks, modes, zstd_dict=zstd_dict).items():
         total = len(cverts) + len(cfaces)
+        print(f'Auto compression trial mode {mode}: {total} bytes in {seconds:.3f}s')
         if best is None or total < best[0]:
             best = (total, mode, cverts, cfaces)
-    print(f'Auto compression selected mode {best[1]} (vertex={len(best[2])} bytes, face={len(best[3])} bytes)')
+    print(f'Auto compression selected mode {best[1]} (vertex={len(best[2])} bytes, face={len(best[3])} bytes) in {time.perf_counter() - started:.3f}s')
     return best[1], best[2], best[3]
 
 
+def chunk_ranges(count, chunk_size):
+    return [(start, min(start + chunk_size, count)) for start in range(0, count, chunk_size)]
+
+
+def pack_chunked_block(flag, chunk_size, element_counts, raw_chunks, compressed_chunks):
+    """[flag][chunk count][elements per chunk][(elements, raw length, stored length) per chunk][chunk data...]"""
+    table = b''.join(CHUNK_ENTRY_STRUCT.pack(count, len(raw), len(stored)) for count, raw, stored in zip(element_counts, raw_chunks, compressed_chunks))
+    return CHUNK_HEADER_STRUCT.pack(flag, len(raw_chunks), chunk_size) + table + b''.join(compressed_chunks)
+
+
+def build_chunked_blocks(vertices, faces, vertex_mode, quant_bits, compression, chunk_size, max_error=None, zstd_dict=None, quant_stats=None):
+    """Splits both streams into chunk_size-element pieces that are packed and compressed independently.
+
+    Returns (compression, vertex_block, face_block); the chunked blocks carry their own compression,
+    so the header stores compression | COMPRESSION_CHUNKED and the blocks are not compressed again.
+    quant_stats collects the per-chunk error-bounded quantization stats (see pack_vertices).
+    """
+    if chunk_size <= 0:
+        raise ValueError(f'Chunk size must be a positive number of elements, got {chunk_size}')
+    vertex_ranges = chunk_ranges(len(vertices), chunk_size)
+    face_ranges = chunk_ranges(len(faces), chunk_size)
+    vertex_chunks = [pack_vertices(vertices[start:end], vertex_mode, quant_bits, max_error=max_error, stats=quant_stats, compression=compression, zstd_dict=zstd_dict) for start, end in vertex_ranges]
+    face_chunks = [pack_faces(faces[start:end], len(vertices)) for start, end in face_ranges]
+    chunks = vertex_chunks + face_chunks
+    modes = compressor_modes(zstd_dict) if compression == 6 else [compression]
+
+    best = None
+    for mode, (compressed, seconds) in run_compression_trials(chunks, modes, zstd_dict=zstd_dict).items():
+        total = sum(len(chunk) for chunk in compressed)
+        if compression == 6:
+            print(f'Auto compression trial mode {mode}: {total} bytes over {len(chunks)} chunks in {seconds:.3f}s')
+        if best is None or total < best[0]:
+            best = (total, mode, compressed)
+    total, mode, compressed = best
+    if compression == 6:
+        print(f'Auto compression selected mode {mode} for {len(chunks)} chunks ({total} bytes)')
+    vertex_block = pack_chunked_block(VERT_CHUNKED, chunk_size, [end - start for start, end in vertex_ranges], vertex_chunks, compressed[:len(vertex_chunks)])
+    face_block = pack_chunked_block(FACE_CHUNKED, chunk_size, [end - start for start, end in face_ranges], face_chunks, compressed[len(vertex_chunks):])
+    return mode | COMPRESSION_CHUNKED, vertex_block, face_block
+
+
 def optimize_mesh(vertices, faces):
     """Removes duplicate vertices and degenerate/exact duplicate faces."""
     unique_coords = {}
@@ -190,9 +520,221 @@ def reorder_faces_for_locality(faces):
     return sorted(rotated)
 
 
+def row_hash(rows):
+    """64-bit mix of each row of uint64 words."""
+    hashed = np.zeros(len(rows), dtype=np.uint64)
+    for column, multiplier in zip(rows.T, (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9)):
+        hashed += column * np.uint64(multiplier)
+        hashed ^= hashed >> np.uint64(31)
+    return hashed
+
+
+def row_groups(words):
+    """Groups equal rows of an (N,K) uint64 array; returns (first row of each group, group of each row).
+
+    Rows are bucketed by a hash and then checked word for word; on a hash collision the groups are rebuilt
+    with an exact np.unique over the row bytes.
+    """
+    hashed = row_hash(words)
+    order = np.argsort(hashed)
+    sorted_hashed = hashed[order]
+    group_start = np.ones(len(order), dtype=bool)
+    group_start[1:] = sorted_hashed[1:] != sorted_hashed[:-1]
+    group = np.empty(len(order), dtype=np.int64)
+    group[order] = np.cumsum(group_start) - 1
+    first = np.minimum.reduceat(order, np.flatnonzero(group_start)) if len(order) else order
+    if not np.array_equal(words[first[group]], words):
+        row_bytes = np.ascontiguousarray(words).view(np.dtype((np.void, words.itemsize * words.shape[1])))
+        _, first, group = np.unique(row_bytes.ravel(), return_index=True, return_inverse=True)
+        group = group.ravel()
+    return first, group
+
+
+def weld_vertices(corners):
+    """Merges equal coordinate rows in bulk; returns (unique rows in first-occurrence order, index per row).
+
+    Matches the dict-of-tuples dedup in optimize_mesh: -0.0 welds with 0.0 and rows containing NaN stay distinct.
+    """
+    keys = np.ascontiguousarray(corners, dtype=np.float64) + 0.0
+    rows = np.flatnonzero(~np.isnan(keys).any(axis=1))
+    first, group = row_groups(keys[rows].view(np.uint64))
+    owner = np.arange(len(keys))
+    owner[rows] = rows[first[group]]
+    is_first = owner == np.arange(len(keys))
+    rank = np.cumsum(is_first) - 1
+    return corners[is_first], rank[owner]
+
+
+def optimize_mesh_array(vertices, faces):
+    """Array version of optimize_mesh; returns (N,3) float64 vertices and (M,3) int64 faces."""
+    vertices = vertex_array(vertices)
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    deduped_vertices, remap = weld_vertices(vertices)
+    new_faces = remap[faces]
+    new_faces = new_faces[(new_faces[:, 0] != new_faces[:, 1]) & (new_faces[:, 1] != new_faces[:, 2]) & (new_faces[:, 0] != new_faces[:, 2])]
+    first, _ = row_groups(new_faces.view(np.uint64))
+    is_first = np.zeros(len(new_faces), dtype=bool)
+    is_first[first] = True
+    final_faces = new_faces[is_first]
+    print(f'Optimization: Reduced {len(vertices)} verts to {len(deduped_vertices)}. Reduced {len(faces)} faces to {len(final_faces)}.')
+    return deduped_vertices, final_faces
+
+
+def reorder_vertices_for_locality_array(vertices, faces):
+    """Array version of reorder_vertices_for_locality: vertices in order of first use, unused ones last."""
+    used, first_use = np.unique(faces.ravel(), return_index=True)
+    unused = np.ones(len(vertices), dtype=bool)
+    unused[used] = False
+    order = np.concatenate([used[np.argsort(first_use)], np.flatnonzero(unused)])
+    remap = np.empty(len(vertices), dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    return vertices[order], remap[faces]
+
+
+def reorder_faces_for_locality_array(faces):
+    """Array version of reorder_faces_for_locality: rotates each face to its smallest index, then lexsorts."""
+    a, b, c = faces.T
+    shift = np.where((a <= b) & (a <= c), 0, np.where((b <= a) & (b <= c), 1, 2))
+    rotated = np.take_along_axis(faces, (shift[:, None] + np.arange(3)) % 3, axis=1)
+    return rotated[np.lexsort((rotated[:, 2], rotated[:, 1], rotated[:, 0]))]
+
+
+def optimize_mesh_pipeline(vertices, faces):
+    """Dedup, first-use vertex order and sorted faces; array-based when NumPy is installed."""
+    if np is not None:
+        vertices, faces = optimize_mesh_array(vertices, faces)
+        vertices, faces = reorder_vertices_for_locality_array(vertices, faces)
+        return vertices, reorder_faces_for_locality_array(faces)
+    vertices, faces = optimize_mesh(vertices, faces)
+    vertices, faces = reorder_vertices_for_locality(vertices, faces)
+    return vertices, reorder_faces_for_locality(faces)
+
+
+def vertex_cache_misses(faces, cache_size=VERTEX_CACHE_SIZE):
+    """Counts post-transform cache misses for faces drawn in order through a FIFO cache of cache_size vertices."""
+    flat = faces.ravel().tolist() if np is not None and isinstance(faces, np.ndarray) else [idx for face in faces for idx in face]
+    inserted_at = {}
+    misses = 0
+    for idx in flat:
+        stamp = inserted_at.get(idx)
+        if stamp is None or misses - stamp >= cache_size:
+            inserted_at[idx] = misses
+            misses += 1
+    return misses
+
+
+def vertex_cache_stats(faces, vertex_count, cache_size=VERTEX_CACHE_SIZE):
+    """Returns (ACMR, ATVR): cache misses per triangle and per vertex."""
+    misses = vertex_cache_misses(faces, cache_size)
+    return misses / max(len(faces), 1), misses / max(vertex_count, 1)
+
+
+def tipsify(faces, vertex_count, cache_size=VERTEX_CACHE_SIZE):
+    """Orders faces for vertex cache reuse (Sander et al., "Fast Triangle Reordering for Vertex Locality and Reduced Overdraw").
+
+    Fans around a focus vertex, then moves to the emitted vertex that is still in the cache and has the most
+    triangles left, falling back to the dead-end stack and finally to the next vertex with live triangles.
+    """
+    triangles = faces.tolist() if np is not None and isinstance(faces, np.ndarray) else [list(face) for face in faces]
+    adjacency = [[] for _ in range(vertex_count)]
+    for t, face in enumerate(triangles):
+        for idx in face:
+            adjacency[idx].append(t)
+    live = [len(adjacent) for adjacent in adjacency]
+    cache_time = [0] * vertex_count
+    emitted = [False] * len(triangles)
+    dead_end = []
+    order = []
+    stamp = cache_size + 1
+    cursor = 0
+    focus = 0 if vertex_count else -1
+    while focus >= 0:
+        candidates = []
+        for t in adjacency[focus]:
+            if emitted[t]:
+                continue
+            emitted[t] = True
+            order.append(t)
+            for idx in triangles[t]:
+                dead_end.append(idx)
+                candidates.append(idx)
+                live[idx] -= 1
+                if stamp - cache_time[idx] > cache_size:
+                    cache_time[idx] = stamp
+                    stamp += 1
+        focus = -1
+        best = -1
+        for idx in candidates:
+            if live[idx] > 0:
+                priority = 0
+                if stamp - cache_time[idx] + 2 * live[idx] <= cache_size:
+                    priority = stamp - cache_time[idx]
+                if priority > best:
+                    best = priority
+                    focus = idx
+        while focus < 0 and dead_end:
+            idx = dead_end.pop()
+            if live[idx] > 0:
+                focus = idx
+        while focus < 0 and cursor < vertex_count:
+            if live[cursor] > 0:
+                focus = cursor
+            cursor += 1
+    if np is not None and isinstance(faces, np.ndarray):
+        return faces[np.asarray(order, dtype=np.int64)].reshape(-1, 3)
+    return [tuple(triangles[t]) for t in order]
+
+
+def order_faces_for_vertex_cache(vertices, faces, cache_size=VERTEX_CACHE_SIZE):
+    """Tipsify face order followed by first-use vertex renumbering."""
+    faces = tipsify(faces, len(vertices), cache_size)
+    if np is not None and isinstance(faces, np.ndarray):
+        return reorder_vertices_for_locality_array(vertices, faces)
+    return reorder_vertices_for_locality(vertices, faces)
+
+
+def order_faces_for_topology(vertices, faces):
+    """Puts faces and vertices in topology traversal order so pack_faces can use FACE_TOPOLOGY; non-manifold meshes are returned unchanged."""
+    traversal = topology_traversal(faces, len(vertices))
+    if traversal is None:
+        print('Topology face coding needs manifold connectivity; keeping locality order.')
+        return vertices, faces
+    symbols, _, sequence, order = traversal
+    used = set(order)
+    order += [idx for idx in range(len(vertices)) if idx not in used]
+    remap = [0] * len(vertices)
+    for new_idx, old_idx in enumerate(order):
+        remap[old_idx] = new_idx
+    decoded = [[remap[v] for v in face] for face in sequence]
+    print(f'Topology face coding: {len(symbols)} symbols for {len(decoded)} faces ({2 * len(symbols) / max(len(decoded), 1):.2f} bits per triangle before compression).')
+    if np is not None and isinstance(vertices, np.ndarray):
+        return vertices[np.asarray(order, dtype=np.int64)], np.asarray(decoded, dtype=np.int64).reshape(-1, 3)
+    return [vertices[idx] for idx in order], [tuple(face) for face in decoded]
+
+
+def compressed_mesh_size(vertices, faces, vertex_mode, quant_bits, codec, chunk_size=0, max_error=None, zstd_dict=None):
+    if chunk_size:
+        _, vertex_block, face_block = build_chunked_blocks(vertices, faces, vertex_mode, quant_bits, codec, chunk_size, max_error, zstd_dict)
+        return len(vertex_block) + len(face_block)
+    return len(compress_with_mode(pack_vertices(vertices, vertex_mode, quant_bits, faces, max_error, compression=codec, zstd_dict=zstd_dict), codec, zstd_dict)) + len(compress_with_mode(pack_faces(faces, len(vertices)), codec, zstd_dict))
+
+
+def report_face_order(face_order, baseline, ordered, ordered_size, vertex_mode, quant_bits, codec, chunk_size=0, max_error=None, zstd_dict=None):
+    """Prints vertex cache ACMR/ATVR and compressed size of the chosen face order against locality order."""
+    base_acmr, base_atvr = vertex_cache_stats(baseline[1], len(baseline[0]))
+    acmr, atvr = vertex_cache_stats(ordered[1], len(ordered[0]))
+    base_size = compressed_mesh_size(baseline[0], baseline[1], vertex_mode, quant_bits, codec, chunk_size, max_error, zstd_dict)
+    change = (ordered_size - base_size) / base_size * 100 if base_size else 0.0
+    print(f'Face order {face_order} (FIFO cache {VERTEX_CACHE_SIZE}): ACMR {base_acmr:.3f} -> {acmr:.3f}, ATVR {base_atvr:.3f} -> {atvr:.3f}, '
+          f'compressed {base_size} -> {ordered_size} bytes ({change:+.1f}%) vs locality')
+    return {'ACMR': round(acmr, 4), 'ATVR': round(atvr, 4)}
+
+
 def byte_plane_shuffle(data: bytes, element_size: int) -> bytes:
     if not data or element_size <= 1 or len(data) % element_size != 0:
         return data
+    if np is not None:
+        return np.frombuffer(data, dtype=np.uint8).reshape(-1, element_size).T.tobytes()
     count = len(data) // element_size
     out = bytearray(len(data))
     mv = memoryview(data)
@@ -222,6 +764,51 @@ def _bitpack(values, bits_per_value):
     return bytes(out)
 
 
+def bitpack_values(values, bits_per_value):
+    """Bulk version of _bitpack for 1-32 bit widths; writes the same LSB-first byte layout."""
+    if bits_per_value <= 0:
+        return b''
+    if bits_per_value > 32:
+        raise ValueError(f'Bit width {bits_per_value} is outside the supported 1-32 range')
+    mask = (1 << bits_per_value) - 1
+    if np is not None:
+        flat = np.asarray(values, dtype=np.int64).ravel()
+        out_of_range = (flat < 0) | (flat > mask)
+        if out_of_range.any():
+            raise ValueError(f'Value {flat[np.argmax(out_of_range)]} cannot fit in {bits_per_value} bits')
+        if bits_per_value in (8, 16, 32):
+            return flat.astype(f'<u{bits_per_value // 8}').tobytes()
+        # Eight values always fill exactly bits_per_value bytes, so pack group-wise: every
+        # (value slot, byte slot) pair that overlaps is one vectorized shift-and-or.
+        groups = np.zeros(-(-len(flat) // 8) * 8, dtype=np.uint64)
+        groups[:len(flat)] = flat
+        groups = np.ascontiguousarray(groups.reshape(-1, 8).T)
+        out = np.zeros((bits_per_value, groups.shape[1]), dtype=np.uint8)
+        for slot in range(8):
+            first_bit = slot * bits_per_value
+            column = groups[slot]
+            for byte in range(first_bit // 8, (first_bit + bits_per_value - 1) // 8 + 1):
+                shift = 8 * byte - first_bit
+                part = column >> np.uint64(shift) if shift >= 0 else column << np.uint64(-shift)
+                out[byte] |= part.astype(np.uint8)
+        return out.T.tobytes()[:(len(flat) * bits_per_value + 7) // 8]
+
+    values = list(values)
+    for value in values:
+        if value < 0 or value > mask:
+            raise ValueError(f'Value {value} cannot fit in {bits_per_value} bits')
+    out = bytearray()
+    for start in range(0, len(values), 8):
+        acc = 0
+        shift = 0
+        for value in values[start:start + 8]:
+            acc |= value << shift
+            shift += bits_per_value
+        out += acc.to_bytes(bits_per_value, 'little')
+    del out[(len(values) * bits_per_value + 7) // 8:]
+    return bytes(out)
+
+
 def zigzag_encode(value: int) -> int:
     return (value << 1) ^ (value >> 63)
 
@@ -240,37 +827,180 @@ def encode_varints(values):
     return bytes(out)
 
 
+VARINT_MAX_BYTES = 10
+
+
+def zigzag_encode_array(values):
+    values = np.asarray(values, dtype=np.int64)
+    return ((values << 1) ^ (values >> 63)).view(np.uint64)
+
+
+def varint_lengths(values):
+    """Number of 7-bit groups each unsigned value needs as a varint."""
+    values = np.asarray(values, dtype=np.uint64)
+    lengths = np.ones(values.shape, dtype=np.int64)
+    for group in range(1, VARINT_MAX_BYTES):
+        lengths += values >= np.uint64(1 << (7 * group))
+    return lengths
+
+
+def varint_size(values) -> int:
+    return int(varint_lengths(values).sum())
+
+
+def encode_varints_array(values):
+    """Bulk version of encode_varints: scatters each 7-bit group of every value in one vectorized pass."""
+    values = np.asarray(values, dtype=np.uint64)
+    lengths = varint_lengths(values)
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    out = np.empty(int(ends[-1]) if len(ends) else 0, dtype=np.uint8)
+    for group in range(int(lengths.max()) if len(lengths) else 0):
+        active = lengths > group
+        chunk = (values[active] >> np.uint64(7 * group)) & np.uint64(0x7F)
+        more = (lengths[active] > group + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[active] + group] = (chunk | more).astype(np.uint8)
+    return out.tobytes()
+
+
 def component_stream_bytes(values, fmt):
-    raw = b''.join(struct.pack(fmt, v) for v in values)
+    raw = struct.pack(f'{fmt[0]}{len(values)}{fmt[1:]}', *values)
     return byte_plane_shuffle(raw, struct.calcsize(fmt))
 
 
+def vertex_array(vertices):
+    """Returns the vertices as an (N,3) float64 array (vertex list or array input)."""
+    return np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+
+
+def component_stream_array(column, fmt):
+    """Array version of component_stream_bytes: casts a whole column and shuffles its byte planes in bulk."""
+    with np.errstate(over='ignore'):
+        packed = column.astype(np.dtype(fmt))
+    if np.any(np.isinf(packed) & np.isfinite(column)):
+        raise OverflowError(f'float too large to pack with {fmt[1:]} format')
+    return packed.view(np.uint8).reshape(-1, packed.itemsize).T.tobytes()
+
+
 def pack_vertices_lossless(vertices):
+    if np is not None:
+        columns = vertex_array(vertices)
+        stream = lambda axis, fmt: component_stream_array(columns[:, axis], fmt)
+    else:
+        stream = lambda axis, fmt: component_stream_bytes([v[axis] for v in vertices], fmt)
     try:
         fmt = '<e'
         flag = VERT_STREAM_FLOAT16
-        xs = component_stream_bytes([v[0] for v in vertices], fmt)
-        ys = component_stream_bytes([v[1] for v in vertices], fmt)
-        zs = component_stream_bytes([v[2] for v in vertices], fmt)
+        xs = stream(0, fmt)
+        ys = stream(1, fmt)
+        zs = stream(2, fmt)
     except Exception as exc:
         print(f'Half-float stream packing failed, reverting to float32 split streams: {exc}')
         fmt = '<f'
         flag = VERT_STREAM_FLOAT32
-        xs = component_stream_bytes([v[0] for v in vertices], fmt)
-        ys = component_stream_bytes([v[1] for v in vertices], fmt)
-        zs = component_stream_bytes([v[2] for v in vertices], fmt)
+        xs = stream(0, fmt)
+        ys = stream(1, fmt)
+        zs = stream(2, fmt)
 
     header = struct.pack('<BIII', flag, len(xs), len(ys), len(zs))
     return header + xs + ys + zs
 
 
+def float32_bits(column):
+    """uint32 bit patterns of a float64 column cast to float32; raises OverflowError like component_stream_array."""
+    with np.errstate(over='ignore'):
+        packed = column.astype('<f4')
+    if np.any(np.isinf(packed) & np.isfinite(column)):
+        raise OverflowError('float too large to pack with f format')
+    return packed.view('<u4')
+
+
+def predict_float_bits(bits, predictor):
+    """Residual of each float32 bit pattern against the previous one: XOR, or zigzag delta of sign-ordered patterns."""
+    if predictor == FLOAT_PREDICT_NONE:
+        return bits
+    if np is not None:
+        residuals = bits.copy()
+        if predictor == FLOAT_PREDICT_XOR:
+            residuals[1:] ^= bits[:-1]
+            return residuals
+        ordered = np.where(bits >> 31, ~bits, bits | np.uint32(0x80000000)).astype(np.uint32)
+        residuals = ordered.copy()
+        residuals[1:] = ordered[1:] - ordered[:-1]
+        signed = residuals.view(np.int32)
+        return ((signed << 1) ^ (signed >> 31)).view(np.uint32)
+    residuals = []
+    previous = 0
+    for value in bits:
+        if predictor == FLOAT_PREDICT_XOR:
+            residuals.append(value ^ previous)
+            previous = value
+            continue
+        ordered = (~value & 0xFFFFFFFF) if value >> 31 else value | 0x80000000
+        delta = (ordered - previous) & 0xFFFFFFFF
+        delta = delta - (1 << 32) if delta >> 31 else delta
+        residuals.append(zigzag_encode(delta) & 0xFFFFFFFF)
+        previous = ordered
+    return residuals
+
+
+def float32_stream(bits, predictor):
+    residuals = predict_float_bits(bits, predictor)
+    if np is not None:
+        return byte_plane_shuffle(np.asarray(residuals, dtype='<u4').tobytes(), 4)
+    return byte_plane_shuffle(struct.pack(f'<{len(residuals)}I', *residuals), 4)
+
+
+def compressed_size_estimator(compression=None, zstd_dict=None):
+    """Rates candidate streams by their size under compression (the smallest codec mode 6 tries for mode 6), or
+    by a zlib level-1 probe when the codec is not known."""
+    if compression is None:
+        return lambda data: len(zlib.compress(data, 1))
+    modes = compressor_modes(zstd_dict) if compression == 6 else [compression]
+    return lambda data: min(len(compress_with_mode(data, mode, zstd_dict)) for mode in modes)
+
+
+def pack_float32_stream(bits, estimate=None):
+    """Tries each predictor on one axis and keeps the shuffled stream estimate (see compressed_size_estimator)
+    rates smallest, the plain one on ties; returns (predictor, data)."""
+    estimate = estimate or compressed_size_estimator()
+    candidates = [(predictor, float32_stream(bits, predictor)) for predictor in (FLOAT_PREDICT_NONE, FLOAT_PREDICT_XOR, FLOAT_PREDICT_DELTA)]
+    return min(candidates, key=lambda candidate: estimate(candidate[1]))
+
+
+def pack_vertices_exact(vertices, compression=None, zstd_dict=None):
+    """Bit-exact float32 X/Y/Z streams, each with its own XOR/delta bit-pattern predictor before the byte shuffle.
+
+    Predictors are picked by their size under compression; the block falls back to plain streams when those
+    compress smaller as a whole.
+    """
+    if np is not None:
+        columns = vertex_array(vertices)
+        axes = [float32_bits(columns[:, axis]) for axis in range(3)]
+    else:
+        axes = [list(struct.unpack(f'<{len(vertices)}I', struct.pack(f'<{len(vertices)}f', *(v[axis] for v in vertices)))) for axis in range(3)]
+    estimate = compressed_size_estimator(compression, zstd_dict)
+    predictors, streams = zip(*(pack_float32_stream(bits, estimate) for bits in axes))
+    block = struct.pack('<BBBBIII', VERT_STREAM_FLOAT32_PREDICTED, *predictors, *(len(stream) for stream in streams)) + b''.join(streams)
+    if compression is None or not any(predictors):
+        return block
+    streams = [stream if predictor == FLOAT_PREDICT_NONE else float32_stream(bits, FLOAT_PREDICT_NONE) for predictor, stream, bits in zip(predictors, streams, axes)]
+    plain = struct.pack('<BBBBIII', VERT_STREAM_FLOAT32_PREDICTED, *(FLOAT_PREDICT_NONE,) * 3, *(len(stream) for stream in streams)) + b''.join(streams)
+    return plain if estimate(plain) <= estimate(block) else block
+
+
 def quantize_component(values, bits):
-    min_v = min(values) if values else 0.0
-    max_v = max(values) if values else 0.0
+    if np is not None:
+        values = np.asarray(values, dtype=np.float64)
+    min_v = float(values.min() if np is not None else min(values)) if len(values) else 0.0
+    max_v = float(values.max() if np is not None else max(values)) if len(values) else 0.0
     if max_v == min_v:
         return min_v, max_v, [0] * len(values)
     max_int = (1 << bits) - 1
     scale = max_int / (max_v - min_v)
+    if np is not None:
+        quantized = np.rint((values - min_v) * scale)
+        return min_v, max_v, np.clip(quantized, 0, max_int).astype(np.int64)
     quantized = []
     for value in values:
         q = int(round((value - min_v) * scale))
@@ -282,18 +1012,29 @@ def quantize_component(values, bits):
     return min_v, max_v, quantized
 
 
-def pack_vertices_quantized(vertices, quant_bits):
+def pack_vertices_quantized(vertices, quant_bits, max_error=None, stats=None):
+    """With max_error set, quant_bits is ignored and each axis gets the fewest bits that keep every decoded
+    coordinate within max_error (VERT_QUANTIZED_AXES); the per-axis stats are then appended to stats if given."""
+    if max_error is not None:
+        block, axis_stats = pack_vertices_error_bounded(vertices, max_error)
+        if stats is not None:
+            stats.append(axis_stats)
+        return block
     if not (1 <= quant_bits <= 24):
         raise ValueError('quantBits must be between 1 and 24')
-    xs = [v[0] for v in vertices]
-    ys = [v[1] for v in vertices]
-    zs = [v[2] for v in vertices]
+    if np is not None:
+        columns = vertex_array(vertices)
+        xs, ys, zs = columns[:, 0], columns[:, 1], columns[:, 2]
+    else:
+        xs = [v[0] for v in vertices]
+        ys = [v[1] for v in vertices]
+        zs = [v[2] for v in vertices]
     min_x, max_x, qx = quantize_component(xs, quant_bits)
     min_y, max_y, qy = quantize_component(ys, quant_bits)
     min_z, max_z, qz = quantize_component(zs, quant_bits)
-    packed_x = _bitpack(qx, quant_bits)
-    packed_y = _bitpack(qy, quant_bits)
-    packed_z = _bitpack(qz, quant_bits)
+    packed_x = bitpack_values(qx, quant_bits)
+    packed_y = bitpack_values(qy, quant_bits)
+    packed_z = bitpack_values(qz, quant_bits)
     header = struct.pack(
         '<BBffffffIII',
         VERT_QUANTIZED,
@@ -311,35 +1052,393 @@ def pack_vertices_quantized(vertices, quant_bits):
     return header + packed_x + packed_y + packed_z
 
 
-def pack_vertices(vertices, vertex_mode='lossless', quant_bits=14):
+def float32_round(value, direction=0):
+    """Nearest float32 to value; with direction -1/+1 the nearest float32 that is <= / >= value."""
+    rounded = struct.unpack('<f', struct.pack('<f', value))[0]
+    if direction * (value - rounded) <= 0:
+        return rounded
+    if rounded == 0.0:
+        return direction * struct.unpack('<f', struct.pack('<I', 1))[0]
+    bits = struct.unpack('<I', struct.pack('<f', rounded))[0]
+    bits += 1 if (rounded > 0) == (direction > 0) else -1
+    return struct.unpack('<f', struct.pack('<I', bits))[0]
+
+
+def quantize_axis_error(values, min_v, max_v, bits):
+    """Quantizes one axis against float32 bounds; returns (q, max error, squared error sum) of the values the
+    renderer reconstructs (float32 of min + q * (max - min) / (2**bits - 1))."""
+    max_int = (1 << bits) - 1
+    if np is not None:
+        if max_int == 0 or max_v == min_v:
+            quantized = np.zeros(len(values), dtype=np.int64)
+            decoded = np.full(len(values), min_v, dtype=np.float32).astype(np.float64)
+        else:
+            quantized = np.clip(np.rint((values - min_v) * (max_int / (max_v - min_v))), 0, max_int).astype(np.int64)
+            decoded = (min_v + quantized * ((max_v - min_v) / max_int)).astype(np.float32).astype(np.float64)
+        errors = np.abs(decoded - values)
+        return quantized, float(errors.max()) if len(errors) else 0.0, float(np.dot(errors, errors))
+    if max_int == 0 or max_v == min_v:
+        quantized = [0] * len(values)
+        decoded = [float32_round(min_v)] * len(values)
+    else:
+        scale = max_int / (max_v - min_v)
+        quantized = [min(max(int(round((value - min_v) * scale)), 0), max_int) for value in values]
+        step = (max_v - min_v) / max_int
+        decoded = struct.unpack(f'<{len(values)}f', struct.pack(f'<{len(values)}f', *(min_v + q * step for q in quantized)))
+    errors = [abs(d - value) for d, value in zip(decoded, values)]
+    return quantized, max(errors, default=0.0), sum(error * error for error in errors)
+
+
+def quantize_axis_bounded(values, max_error):
+    """Fewest bits (0 for a flat axis, else 1-24) whose reconstruction stays within max_error.
+
+    Returns (min, max, bits, q, max error, squared error sum); bounds are float32 so the header stores them exactly.
+    """
+    if np is not None:
+        values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return 0.0, 0.0, 0, [], 0.0, 0.0
+    low = float(values.min() if np is not None else min(values))
+    high = float(values.max() if np is not None else max(values))
+    min_v, max_v = float32_round(low, -1), float32_round(high, 1)
+    if low == high and min_v == low:
+        return (min_v, min_v, 0, *quantize_axis_error(values, min_v, min_v, 0))
+    bits = max(1, min(24, math.ceil(math.log2((max_v - min_v) / (2 * max_error) + 1)) - 1))
+    while True:
+        quantized, achieved, squares = quantize_axis_error(values, min_v, max_v, bits)
+        if achieved <= max_error:
+            return min_v, max_v, bits, quantized, achieved, squares
+        if bits == 24:
+            raise ValueError(f'Max error {max_error:g} is below what 24-bit quantization reaches ({achieved:g}); use vertexMode=exact')
+        bits += 1
+
+
+def pack_vertices_error_bounded(vertices, max_error):
+    """[flag][bits X,Y,Z][min/max X,Y,Z (float32)][stream lengths][bit-packed X][Y][Z]; returns (block, per-axis stats).
+
+    Per-axis stats are (bits, max error, squared error sum, value count).
+    """
+    if not max_error > 0:
+        raise ValueError('Max error must be greater than 0')
+    if np is not None:
+        columns = vertex_array(vertices)
+        axes = [columns[:, axis] for axis in range(3)]
+    else:
+        axes = [[v[axis] for v in vertices] for axis in range(3)]
+    bounds, widths, streams, stats = [], [], [], []
+    for values in axes:
+        min_v, max_v, bits, quantized, achieved, squares = quantize_axis_bounded(values, max_error)
+        bounds += [min_v, max_v]
+        widths.append(bits)
+        streams.append(bitpack_values(quantized, bits))
+        stats.append((bits, achieved, squares, len(values)))
+    header = QUANTIZED_AXES_HEADER_STRUCT.pack(VERT_QUANTIZED_AXES, *widths, *bounds, *(len(stream) for stream in streams))
+    return header + b''.join(streams), stats
+
+
+def resolve_max_error(vertices, max_error=None, max_rel_error=None):
+    """Absolute per-coordinate tolerance from --max-error or --max-rel-error (fraction of the bounding box diagonal)."""
+    if max_rel_error is None:
+        return max_error
+    if max_error is not None:
+        raise ValueError('Use either a max error or a max relative error, not both')
+    if np is not None:
+        columns = vertex_array(vertices)
+        extents = (columns.max(axis=0) - columns.min(axis=0)).astype(np.float64).tolist() if len(columns) else [0.0] * 3
+    else:
+        extents = [max((v[axis] for v in vertices), default=0.0) - min((v[axis] for v in vertices), default=0.0) for axis in range(3)]
+    return max_rel_error * math.sqrt(sum(extent * extent for extent in extents))
+
+
+def report_quantization(max_error, block_stats):
+    """Prints the per-axis widths and achieved max/RMS coordinate error of error-bounded quantization.
+
+    block_stats holds the per-axis stats of every packed block or chunk, as collected by pack_vertices.
+    """
+    widths = [0, 0, 0]
+    achieved = 0.0
+    squares = 0.0
+    count = 0
+    for axis_stats in block_stats:
+        for axis, (bits, axis_error, axis_squares, axis_count) in enumerate(axis_stats):
+            widths[axis] = max(widths[axis], bits)
+            achieved = max(achieved, axis_error)
+            squares += axis_squares
+            count += axis_count
+    rms = math.sqrt(squares / count) if count else 0.0
+    print(f'Error-bounded quantization (max error {max_error:.6g}): X/Y/Z bits {widths[0]}/{widths[1]}/{widths[2]}, '
+          f'achieved max error {achieved:.6g}, RMS {rms:.6g}')
+    return {'Quant Bits': widths, 'Max Error': max_error, 'Achieved Max Error': achieved, 'RMS Error': rms}
+
+
+def prediction_references(faces, vertex_count):
+    """Per-vertex (r1, r2, r3) with prediction q[r1] + q[r2] - q[r3]; index vertex_count is an all-zero row.
+
+    Vertex v is predicted from the first face that uses it, (v, u, w): a parallelogram u + w - d across edge
+    (u, w) when u, w and the opposite vertex d are all below v, else the last earlier corner of that face, else
+    vertex v - 1. Only faces are needed, so the decoder rebuilds the same references before any vertex.
+    """
+    zero = vertex_count
+    if np is not None:
+        faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+        refs = np.empty((vertex_count, 3), dtype=np.int64)
+        previous = np.arange(vertex_count) - 1
+        previous[:1] = zero
+        refs[:] = previous[:, None]
+        if not len(faces):
+            return refs
+        used, first_pos = np.unique(faces.ravel(), return_index=True)
+        face_idx, corner = first_pos // 3, first_pos % 3
+        u = faces[face_idx, (corner + 1) % 3]
+        w = faces[face_idx, (corner + 2) % 3]
+        edge_keys = np.concatenate([faces[:, 0] * vertex_count + faces[:, 1], faces[:, 1] * vertex_count + faces[:, 2], faces[:, 2] * vertex_count + faces[:, 0]])
+        opposite = np.concatenate([faces[:, 2], faces[:, 0], faces[:, 1]])
+        position = np.concatenate([np.arange(len(faces)) * 3 + 2, np.arange(len(faces)) * 3, np.arange(len(faces)) * 3 + 1])
+        order = np.lexsort((position, edge_keys))
+        sorted_keys = edge_keys[order]
+        lookup = w * vertex_count + u
+        slot = np.minimum(np.searchsorted(sorted_keys, lookup), len(sorted_keys) - 1)
+        d = np.where(sorted_keys[slot] == lookup, opposite[order[slot]], vertex_count)
+        single = np.where(u < used, np.where(w < used, np.maximum(u, w), u), np.where(w < used, w, -1))
+        parallelogram = (u < used) & (w < used) & (d < used)
+        chosen = np.where(parallelogram[:, None], np.stack([u, w, d], axis=1), single[:, None])
+        keep = parallelogram | (single >= 0)
+        refs[used[keep]] = chosen[keep]
+        return refs
+    refs = [(idx - 1, idx - 1, idx - 1) if idx else (zero, zero, zero) for idx in range(vertex_count)]
+    opposite = {}
+    seen = set()
+    firsts = []
+    for x, y, z in faces:
+        for a, b, c in ((x, y, z), (y, z, x), (z, x, y)):
+            opposite.setdefault((a, b), c)
+            if c not in seen:
+                seen.add(c)
+                firsts.append((c, a, b))
+    for v, u, w in firsts:
+        d = opposite.get((w, u), vertex_count)
+        if u < v and w < v and d < v:
+            refs[v] = (u, w, d)
+        elif u < v or w < v:
+            single = max(u, w) if u < v and w < v else (u if u < v else w)
+            refs[v] = (single, single, single)
+    return refs
+
+
+def pack_residual_stream(residuals):
+    """Zigzag residuals as a bitpacked stream, or varints when smaller; returns (bit width or 0 for varint, data)."""
+    if np is not None:
+        zz = zigzag_encode_array(np.asarray(residuals, dtype=np.int64))
+        bits = max(1, int(zz.max()).bit_length()) if len(zz) else 1
+        varint_len = varint_size(zz)
+    else:
+        zz = [zigzag_encode(value) for value in residuals]
+        bits = max(1, max(zz, default=0).bit_length())
+        varint_len = sum((value.bit_length() + 6) // 7 or 1 for value in zz)
+    if bits <= 32 and (len(zz) * bits + 7) // 8 <= varint_len:
+        return bits, bitpack_values(zz, bits)
+    return 0, encode_varints_array(zz) if np is not None else encode_varints(zz)
+
+
+def pack_vertices_predicted(vertices, quant_bits, faces=None):
+    """Quantizes like pack_vertices_quantized, then stores per-axis residuals against predicted grid positions."""
+    if not (1 <= quant_bits <= 24):
+        raise ValueError('quantBits must be between 1 and 24')
+    if np is not None:
+        columns = vertex_array(vertices)
+        axes = [columns[:, 0], columns[:, 1], columns[:, 2]]
+    else:
+        axes = [[v[axis] for v in vertices] for axis in range(3)]
+    vertex_count = len(axes[0])
+    predictor = PREDICT_PARALLELOGRAM if faces is not None else PREDICT_PREVIOUS
+    refs = prediction_references(faces if faces is not None else [], vertex_count)
+    bounds = []
+    widths = []
+    streams = []
+    for values in axes:
+        min_v, max_v, quantized = quantize_component(values, quant_bits)
+        bounds += [min_v, max_v]
+        if np is not None:
+            grid = np.append(np.asarray(quantized, dtype=np.int64), 0)
+            residuals = grid[:-1] - (grid[refs[:, 0]] + grid[refs[:, 1]] - grid[refs[:, 2]])
+        else:
+            grid = list(quantized) + [0]
+            residuals = [grid[v] - (grid[r1] + grid[r2] - grid[r3]) for v, (r1, r2, r3) in enumerate(refs)]
+        width, stream = pack_residual_stream(residuals)
+        widths.append(width)
+        streams.append(stream)
+    header = PREDICTED_HEADER_STRUCT.pack(VERT_PREDICTED, quant_bits, predictor, *bounds, *widths, *(len(stream) for stream in streams))
+    return header + b''.join(streams)
+
+
+def pack_vertices(vertices, vertex_mode='lossless', quant_bits=14, faces=None, max_error=None, stats=None, compression=None, zstd_dict=None):
+    """faces are only used by the predicted mode (parallelogram prediction; previous-vertex without them).
+    max_error (quantized mode only) replaces quant_bits with per-axis widths that meet that tolerance; stats
+    (a list) then collects the per-axis stats for report_quantization. compression (and zstd_dict) is the
+    codec the block will be stored with; exact mode picks its predictors for it."""
+    if max_error is not None and vertex_mode.lower() != 'quantized':
+        raise ValueError('Max error is only supported with vertexMode=quantized')
     if vertex_mode.lower() == 'quantized':
-        return pack_vertices_quantized(vertices, quant_bits)
+        return pack_vertices_quantized(vertices, quant_bits, max_error, stats)
+    if vertex_mode.lower() == 'predicted':
+        return pack_vertices_predicted(vertices, quant_bits, faces)
+    if vertex_mode.lower() == 'exact':
+        return pack_vertices_exact(vertices, compression, zstd_dict)
     return pack_vertices_lossless(vertices)
 
 
 def pack_faces_raw_bitpacked(faces, vertex_count):
-    max_index = max((max(face) for face in faces), default=0)
+    if np is not None:
+        flat = np.asarray(faces, dtype=np.int64).ravel()
+        max_index = int(flat.max()) if flat.size else 0
+    else:
+        max_index = max((max(face) for face in faces), default=0)
+        flat = [idx for face in faces for idx in face]
     bits = max(1, max_index.bit_length())
-    flat = [idx for face in faces for idx in face]
-    payload = _bitpack(flat, bits)
+    payload = bitpack_values(flat, bits)
     header = struct.pack('<BBI', FACE_BITPACKED, bits, len(flat))
     return header + payload
 
 
-def pack_faces_delta_varint(faces):
-    flat = [idx for face in faces for idx in face]
-    prev = 0
-    zz = []
-    for idx in flat:
-        delta = idx - prev
-        zz.append(zigzag_encode(delta))
-        prev = idx
-    payload = encode_varints(zz)
-    header = struct.pack('<BI', FACE_DELTA_VARINT, len(flat))
-    return header + payload
+def pack_faces_delta_varint(zz):
+    """FACE_DELTA_VARINT block from the zigzag-encoded deltas of the flattened face indices."""
+    payload = encode_varints_array(zz) if np is not None else encode_varints(zz)
+    return struct.pack('<BI', FACE_DELTA_VARINT, len(zz)) + payload
+
+
+def topology_traversal(faces, vertex_count, strict=False):
+    """Walks the mesh through a stack of gates (open directed edges), as decoded by renderer.decode_topology_faces.
+
+    Each gate whose far side is not decoded yet costs one 2-bit symbol: NEW (next unseen vertex), LEFT/RIGHT
+    (the most recent open boundary edge into the gate's start / out of its end) or ESCAPE with an aux value
+    (0 = boundary, k = vertex k - 1). A new component starts from the first unemitted face with one symbol per
+    corner. Returns (symbols, aux, faces in decode order, vertex per label) or None for non-manifold input
+    (a directed edge shared by two faces). With strict=True the faces must already be in decode order and
+    numbering, and None is returned at the first face that differs.
+    """
+    faces = faces.tolist() if np is not None and isinstance(faces, np.ndarray) else [list(face) for face in faces]
+    across = {}
+    for t, (x, y, z) in enumerate(faces):
+        if x == y or y == z or x == z:
+            return None
+        for edge in ((x, y), (y, z), (z, x)):
+            if edge in across:
+                return None
+            across[edge] = t
+    labels = [-1] * vertex_count
+    order = []
+    symbols = []
+    aux = []
+    emitted = [False] * len(faces)
+    sequence = []
+    decoded = set()
+    boundary_in = {}
+    boundary_out = {}
+    stack = []
+    cursor = 0
+
+    def label(v):
+        if labels[v] < 0:
+            if strict and v != len(order):
+                return False
+            labels[v] = len(order)
+            order.append(v)
+        return True
+
+    def emit(t, face):
+        if strict and face != faces[len(sequence)]:
+            return False
+        emitted[t] = True
+        sequence.append(face)
+        for u, v in ((face[0], face[1]), (face[1], face[2]), (face[2], face[0])):
+            decoded.add((u, v))
+            if (v, u) in decoded:
+                del boundary_out[v][u]
+                del boundary_in[u][v]
+            else:
+                boundary_out.setdefault(u, {})[v] = None
+                boundary_in.setdefault(v, {})[u] = None
+            stack.append((u, v))
+        return True
+
+    while len(sequence) < len(faces):
+        if not stack:
+            while emitted[cursor]:
+                cursor += 1
+            face = faces[cursor]
+            for v in face:
+                if labels[v] < 0:
+                    symbols.append(TOPOLOGY_NEW)
+                else:
+                    symbols.append(TOPOLOGY_ESCAPE)
+                    aux.append(labels[v] + 1)
+                if not label(v):
+                    return None
+            if not emit(cursor, face):
+                return None
+            continue
+        a, b = stack.pop()
+        if (b, a) in decoded:
+            continue
+        t = across.get((b, a))
+        if t is None:
+            symbols.append(TOPOLOGY_ESCAPE)
+            aux.append(0)
+            continue
+        c = next(v for v in faces[t] if v != a and v != b)
+        if boundary_in.get(a) and next(reversed(boundary_in[a])) == c:
+            symbols.append(TOPOLOGY_LEFT)
+        elif boundary_out.get(b) and next(reversed(boundary_out[b])) == c:
+            symbols.append(TOPOLOGY_RIGHT)
+        elif labels[c] < 0:
+            symbols.append(TOPOLOGY_NEW)
+            if not label(c):
+                return None
+        else:
+            symbols.append(TOPOLOGY_ESCAPE)
+            aux.append(labels[c] + 1)
+        if not emit(t, [b, a, c]):
+            return None
+    return symbols, aux, sequence, order
+
+
+def pack_faces_topology(faces):
+    """FACE_TOPOLOGY block, or None unless the faces are already in topology traversal order and numbering."""
+    if not len(faces):
+        return None
+    traversal = topology_traversal(faces, int(np.asarray(faces).max()) + 1 if np is not None else max(max(face) for face in faces) + 1, strict=True)
+    if traversal is None:
+        return None
+    symbols, aux, _, _ = traversal
+    return TOPOLOGY_STRUCT.pack(FACE_TOPOLOGY, len(faces), len(symbols)) + bitpack_values(symbols, 2) + encode_varints(aux)
+
+
+def pack_faces_array(faces, vertex_count, topology=False):
+    """Array version of pack_faces; the varint candidate is only built when its exact size can win."""
+    flat = np.asarray(faces, dtype=np.int64).ravel()
+    if vertex_count <= 0xFFFF:
+        candidates = [bytes([FACE_UINT16]) + flat.astype('<u2').tobytes()]
+    else:
+        candidates = [bytes([FACE_UINT32]) + flat.astype('<u4').tobytes()]
+
+    deltas = np.diff(flat, prepend=0)
+    if not deltas.size or (deltas.min() >= -32768 and deltas.max() <= 32767):
+        candidates.append(bytes([FACE_DELTA_INT16]) + deltas.astype('<i2').tobytes())
+    candidates.append(bytes([FACE_DELTA_INT32]) + deltas.astype('<i4').tobytes())
+    candidates.append(pack_faces_raw_bitpacked(flat, vertex_count))
+    topology_block = pack_faces_topology(flat.reshape(-1, 3)) if topology else None
+    if topology_block is not None:
+        candidates.append(topology_block)
+    zz = zigzag_encode_array(deltas)
+    if 5 + varint_size(zz) < min(len(candidate) for candidate in candidates):
+        candidates.append(pack_faces_delta_varint(zz))
+    return min(candidates, key=len)
 
 
-def pack_faces(faces, vertex_count):
+def pack_faces(faces, vertex_count, topology=False):
+    """Smallest face block; topology=True also tries FACE_TOPOLOGY (faces from order_faces_for_topology)."""
+    if np is not None:
+        return pack_faces_array(faces, vertex_count, topology)
     candidates = []
     if vertex_count <= 0xFFFF:
         raw16 = b''.join(struct.pack('<HHH', *f) for f in faces)
@@ -360,10 +1459,15 @@ def pack_faces(faces, vertex_count):
         min_delta = min(min_delta, delta)
         max_delta = max(max_delta, delta)
     if -32768 <= min_delta <= 32767 and -32768 <= max_delta <= 32767:
-        candidates.append(bytes([FACE_DELTA_INT16]) + b''.join(struct.pack('<h', d) for d in deltas))
-    candidates.append(bytes([FACE_DELTA_INT32]) + b''.join(struct.pack('<i', d) for d in deltas))
+        candidates.append(bytes([FACE_DELTA_INT16]) + struct.pack(f'<{len(deltas)}h', *deltas))
+    candidates.append(bytes([FACE_DELTA_INT32]) + struct.pack(f'<{len(deltas)}i', *deltas))
     candidates.append(pack_faces_raw_bitpacked(faces, vertex_count))
-    candidates.append(pack_faces_delta_varint(faces))
+    topology_block = pack_faces_topology(faces) if topology else None
+    if topology_block is not None:
+        candidates.append(topology_block)
+    zz = [zigzag_encode(delta) for delta in deltas]
+    if 5 + sum((value.bit_length() + 6) // 7 or 1 for value in zz) < min(len(candidate) for candidate in candidates):
+        candidates.append(pack_faces_delta_varint(zz))
     return min(candidates, key=len)
 
 
@@ -391,7 +1495,137 @@ def parse_obj(file_path):
     return vertices, faces
 
 
-def parse_ply(file_path):
+OBJ_BLOCK_SIZE = 4 << 20
+
+
+class FastParseFallback(Exception):
+    """Raised when the bulk OBJ parser meets input it does not handle exactly like parse_obj."""
+
+
+def parse_number_text(text, expected_count, dtype=float):
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        try:
+            values = np.fromstring(text.tobytes(), dtype=dtype, sep=' ')
+        except (ValueError, DeprecationWarning):
+            raise FastParseFallback('unparsable numeric token') from None
+    if len(values) != expected_count:
+        raise FastParseFallback('unexpected token count')
+    return values
+
+
+def record_text(buf, starts, lengths, selected):
+    """Concatenated text of the selected lines with their one-letter record keyword blanked."""
+    text = buf[np.repeat(selected, lengths)]
+    selected_lengths = lengths[selected]
+    text[np.cumsum(selected_lengths) - selected_lengths] = ord(' ')
+    return text
+
+
+def token_counts(text):
+    """Whitespace-separated tokens per newline-terminated line of text."""
+    space = text <= ord(' ')
+    token_starts = np.flatnonzero(space[:-1] & ~space[1:]) + 1
+    if len(text) and not space[0]:
+        token_starts = np.concatenate(([0], token_starts))
+    line_ends = np.flatnonzero(text == ord('\n'))
+    return np.diff(np.searchsorted(token_starts, line_ends), prepend=0)
+
+
+def parse_obj_block(block, vertex_base):
+    """Parses one newline-terminated block of OBJ text; returns (vertices (N,3), faces (M,3), vertex line count)."""
+    buf = np.frombuffer(block, dtype=np.uint8)
+    ends = np.flatnonzero(buf == ord('\n'))
+    starts = np.empty_like(ends)
+    starts[:1] = 0
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts + 1
+    first = buf[starts]
+    second = buf[np.minimum(starts + 1, len(buf) - 1)]
+    if np.any(np.isin(first, list(b' \t\x0b\x0c')) | ((first == ord('\r')) & (lengths > 2))):
+        raise FastParseFallback('indented records')
+    keyword_end = (lengths > 1) & ((second == ord(' ')) | (second == ord('\t')))
+    is_vertex = (first == ord('v')) & keyword_end
+    is_face = (first == ord('f')) & keyword_end
+
+    text = record_text(buf, starts, lengths, is_vertex)
+    counts = token_counts(text)
+    if np.any(counts < 3):
+        raise FastParseFallback('vertex with fewer than three coordinates')
+    values = parse_number_text(text, int(counts.sum()))
+    first_token = np.cumsum(counts) - counts
+    vertices = values[first_token[:, None] + np.arange(3)]
+
+    # Texture/normal references (`/vt/vn`) are dropped so only the position index of each corner remains.
+    text = record_text(buf, starts, lengths, is_face)
+    if b'/' in block:
+        slashes = np.cumsum(text == ord('/'), dtype=np.int32)
+        slashes_at_token_start = np.maximum.accumulate(np.where(text <= ord(' '), slashes, 0))
+        text = text[slashes == slashes_at_token_start]
+        del slashes, slashes_at_token_start
+    counts = token_counts(text)
+    indices = parse_number_text(text, int(counts.sum()), np.int64)
+    del text
+    vertices_before = vertex_base + np.cumsum(is_vertex)[is_face]
+    corner_base = np.repeat(vertices_before, counts)
+    indices = np.where(indices > 0, indices - 1, corner_base + indices)
+
+    polygon = counts >= 3
+    first_corner = (np.cumsum(counts) - counts)[polygon]
+    fan_sizes = counts[polygon] - 2
+    fan_first = np.repeat(first_corner, fan_sizes)
+    fan_step = np.arange(int(fan_sizes.sum())) - np.repeat(np.cumsum(fan_sizes) - fan_sizes, fan_sizes) + 1
+    faces = np.stack([indices[fan_first], indices[fan_first + fan_step], indices[fan_first + fan_step + 1]], axis=1)
+    return vertices, faces, int(is_vertex.sum())
+
+
+def parse_obj_fast(file_path, block_size=OBJ_BLOCK_SIZE):
+    """Bulk OBJ parser: reads the file in OBJ_BLOCK_SIZE blocks and converts `v` and `f` records with array operations.
+
+    Returns (N,3) float64 vertices and (M,3) int64 faces matching parse_obj, including `v/vt/vn` corners,
+    negative indices and polygon fan triangulation. Falls back to parse_obj for input it cannot mirror exactly.
+    """
+    if np is None:
+        return parse_obj(file_path)
+    started = time.perf_counter()
+    vertex_parts = []
+    face_parts = []
+    vertex_base = 0
+    try:
+        with open(file_path, 'rb') as file:
+            carry = b''
+            while True:
+                data = file.read(block_size)
+                if not data:
+                    block, carry = carry, b''
+                else:
+                    data = carry + data
+                    cut = data.rfind(b'\n') + 1
+                    if cut == 0:
+                        carry = data
+                        continue
+                    block, carry = data[:cut], data[cut:]
+                if block:
+                    if not block.endswith(b'\n'):
+                        block += b'\n'
+                    vertices, faces, vertex_lines = parse_obj_block(block, vertex_base)
+                    vertex_parts.append(vertices)
+                    face_parts.append(faces)
+                    vertex_base += vertex_lines
+                if not data:
+                    break
+    except FastParseFallback as exc:
+        print(f'Fast OBJ parse fell back to line parser ({exc}).')
+        return parse_obj(file_path)
+    vertices = np.concatenate(vertex_parts) if vertex_parts else np.zeros((0, 3))
+    faces = np.concatenate(face_parts) if face_parts else np.zeros((0, 3), dtype=np.int64)
+    elapsed = time.perf_counter() - started
+    size_mb = os.path.getsize(file_path) / (1024 * 1024)
+    print(f'Fast OBJ parse: {size_mb:.1f} MB in {elapsed:.3f}s ({size_mb / elapsed if elapsed > 0 else float("inf"):.1f} MB/s)')
+    return vertices, faces
+
+
+def parse_ascii_ply(file_path):
     vertices = []
     faces = []
     with open(file_path, 'r') as file:
@@ -423,6 +1657,154 @@ def parse_ply(file_path):
     return vertices, faces
 
 
+PLY_TYPES = {
+    'char': 'b', 'int8': 'b', 'uchar': 'B', 'uint8': 'B',
+    'short': 'h', 'int16': 'h', 'ushort': 'H', 'uint16': 'H',
+    'int': 'i', 'int32': 'i', 'uint': 'I', 'uint32': 'I',
+    'float': 'f', 'float32': 'f', 'double': 'd', 'float64': 'd',
+}
+PLY_FACE_LISTS = ('vertex_indices', 'vertex_index')
+
+
+def read_ply_header(file):
+    """Reads a PLY header from a binary file; returns (format, [(element, count, properties)]).
+
+    Scalar properties are (name, None, type code) and list properties are (name, count type code, item type code).
+    """
+    if file.readline().strip() != b'ply':
+        raise ValueError('Not a PLY file')
+    ply_format = None
+    elements = []
+    for raw in iter(file.readline, b''):
+        parts = raw.decode('ascii', errors='replace').split()
+        if not parts or parts[0] in ('comment', 'obj_info'):
+            continue
+        if parts[0] == 'end_header':
+            return ply_format, elements
+        if parts[0] == 'format':
+            ply_format = parts[1]
+        elif parts[0] == 'element':
+            elements.append((parts[1], int(parts[2]), []))
+        elif parts[0] == 'property' and parts[1] == 'list':
+            elements[-1][2].append((parts[4], PLY_TYPES[parts[2]], PLY_TYPES[parts[3]]))
+        elif parts[0] == 'property':
+            elements[-1][2].append((parts[2], None, PLY_TYPES[parts[1]]))
+    raise ValueError('PLY header has no end_header')
+
+
+def read_ply_record_layout(body, offset, properties, endian):
+    """struct layout of one record, taking list lengths from the record at offset."""
+    layout = endian
+    for _, count_code, item_code in properties:
+        if count_code is None:
+            layout += item_code
+        else:
+            length = struct.unpack_from(endian + count_code, body, offset + struct.calcsize(layout))[0]
+            layout += count_code + item_code * length
+    return layout
+
+
+def read_ply_element_records(body, offset, count, properties, endian):
+    """Walks records one at a time (lists of varying length); returns ({property: values}, end offset)."""
+    columns = {name: [] for name, _, _ in properties}
+    for _ in range(count):
+        layout = read_ply_record_layout(body, offset, properties, endian)
+        values = struct.unpack_from(layout, body, offset)
+        offset += struct.calcsize(layout)
+        position = 0
+        for name, count_code, _ in properties:
+            if count_code is None:
+                columns[name].append(values[position])
+                position += 1
+            else:
+                length = values[position]
+                columns[name].append(values[position + 1:position + 1 + length])
+                position += 1 + length
+    return columns, offset
+
+
+def read_ply_element(body, offset, count, properties, endian):
+    """Reads one binary element; returns ({property: values}, end offset).
+
+    Elements are read as one structured array when every record has the same list lengths as the first
+    one (e.g. an all-triangle face list); otherwise records are walked one by one.
+    """
+    if count == 0:
+        return {name: [] for name, _, _ in properties}, offset
+    if np is None:
+        if any(count_code is not None for _, count_code, _ in properties):
+            return read_ply_element_records(body, offset, count, properties, endian)
+        layout = endian + ''.join(item_code for _, _, item_code in properties)
+        end = offset + struct.calcsize(layout) * count
+        rows = list(struct.iter_unpack(layout, body[offset:end]))
+        return {name: [row[i] for row in rows] for i, (name, _, _) in enumerate(properties)}, end
+    fields = []
+    first_record = offset
+    for name, count_code, item_code in properties:
+        if count_code is None:
+            fields.append((name, endian + item_code))
+            first_record += struct.calcsize(endian + item_code)
+            continue
+        length = struct.unpack_from(endian + count_code, body, first_record)[0]
+        fields.append(('length ' + name, endian + count_code))
+        fields.append((name, endian + item_code, (length,)))
+        first_record += struct.calcsize(endian + count_code) + length * struct.calcsize(endian + item_code)
+    dtype = np.dtype(fields)
+    end = offset + dtype.itemsize * count
+    if end <= len(body):
+        records = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+        if all(np.all(records['length ' + name] == records[name].shape[1]) for name, count_code, _ in properties if count_code is not None):
+            return {name: records[name] for name, _, _ in properties}, end
+    if len(fields) == len(properties):
+        raise ValueError('PLY body is shorter than its header declares')
+    return read_ply_element_records(body, offset, count, properties, endian)
+
+
+def ply_triangles(polygons):
+    """Fan-triangulates PLY index lists, skipping lists with fewer than three indices."""
+    if np is not None and isinstance(polygons, np.ndarray):
+        corners = polygons.shape[1]
+        if corners < 3:
+            return np.zeros((0, 3), dtype=np.int64)
+        fan = [polygons[:, [0, i, i + 1]] for i in range(1, corners - 1)]
+        return np.stack(fan, axis=1).reshape(-1, 3).astype(np.int64)
+    faces = []
+    for idxs in polygons:
+        for i in range(1, len(idxs) - 1):
+            faces.append((idxs[0], idxs[i], idxs[i + 1]))
+    return np.asarray(faces, dtype=np.int64).reshape(-1, 3) if np is not None else faces
+
+
+def parse_binary_ply(body, elements, endian):
+    vertices = []
+    faces = []
+    offset = 0
+    for name, count, properties in elements:
+        columns, offset = read_ply_element(body, offset, count, properties, endian)
+        if name == 'vertex':
+            if np is not None:
+                vertices = np.stack([np.asarray(columns[axis], dtype=np.float64) for axis in 'xyz'], axis=1).reshape(-1, 3)
+            else:
+                vertices = list(zip(columns['x'], columns['y'], columns['z']))
+        elif name == 'face':
+            lists = [prop for prop, count_code, _ in properties if count_code is not None]
+            face_list = next((prop for prop in PLY_FACE_LISTS if prop in lists), lists[0] if lists else None)
+            if face_list is not None:
+                faces = ply_triangles(columns[face_list])
+    return vertices, faces
+
+
+def parse_ply(file_path):
+    with open(file_path, 'rb') as f:
+        ply_format, elements = read_ply_header(f)
+        if ply_format == 'ascii':
+            return parse_ascii_ply(file_path)
+        if ply_format not in ('binary_little_endian', 'binary_big_endian'):
+            raise ValueError(f'Unsupported PLY format: {ply_format}')
+        body = f.read()
+    return parse_binary_ply(body, elements, '<' if ply_format == 'binary_little_endian' else '>')
+
+
 def is_binary_stl(file_path):
     with open(file_path, 'rb') as f:
         f.seek(80)
@@ -434,25 +1816,29 @@ def is_binary_stl(file_path):
         return 84 + tri_count * 50 == file_size
 
 
+STL_TRIANGLE_DTYPE = np.dtype([('normal', '<f4', 3), ('corners', '<f4', (3, 3)), ('attribute', '<u2')]) if np is not None else None
+
+
 def parse_binary_stl(file_path):
-    vertices = []
-    faces = []
     with open(file_path, 'rb') as f:
         f.seek(80)
         triangle_count_bytes = f.read(4)
         if not triangle_count_bytes:
             return [], []
         triangle_count = struct.unpack('<I', triangle_count_bytes)[0]
-        for _ in range(triangle_count):
-            f.read(12)
-            v1 = struct.unpack('<fff', f.read(12))
-            v2 = struct.unpack('<fff', f.read(12))
-            v3 = struct.unpack('<fff', f.read(12))
+        body = f.read(triangle_count * 50)
+    if np is None:
+        vertices = []
+        faces = []
+        for record in struct.iter_unpack('<12x9f2x', body):
             base_idx = len(vertices)
-            vertices.extend([v1, v2, v3])
+            vertices.extend([record[0:3], record[3:6], record[6:9]])
             faces.append((base_idx, base_idx + 1, base_idx + 2))
-            f.read(2)
-    return vertices, faces
+        return vertices, faces
+    corners = np.frombuffer(body, dtype=STL_TRIANGLE_DTYPE, count=triangle_count)['corners'].reshape(-1, 3).astype(np.float64)
+    vertices, indices = weld_vertices(corners)
+    print(f'STL weld: {len(corners)} corners to {len(vertices)} vertices.')
+    return vertices, indices.reshape(-1, 3)
 
 
 def parse_ascii_stl(file_path):
@@ -482,7 +1868,7 @@ def parse_stl(file_path):
 def parse_model(file_path):
     file_ext = os.path.splitext(file_path)[1].lower()
     if file_ext == '.obj':
-        return parse_obj(file_path), b'BBM\x01'
+        return parse_obj_fast(file_path), b'BBM\x01'
     if file_ext == '.ply':
         return parse_ply(file_path), b'BBM\x02'
     if file_ext == '.stl':
@@ -490,34 +1876,59 @@ def parse_model(file_path):
     raise ValueError(f'Unsupported file format: {file_ext}')
 
 
-def encode_model(input_file, output_handle, file_counter, model_number, compression, encryptionKey, encryptionMode, vertex_mode, quant_bits):
+def prepare_mesh(input_file, face_order='locality', max_error=None, max_rel_error=None):
+    """Parses, optimizes and orders one model; returns (format_tag, locality_mesh, vertices, faces, absolute max_error)."""
+    if face_order not in FACE_ORDERS:
+        raise ValueError(f'Unknown face order: {face_order} (expected one of {", ".join(FACE_ORDERS)})')
     (vertices, faces), format_tag = parse_model(input_file)
-    vertices, faces = optimize_mesh(vertices, faces)
-    vertices, faces = reorder_vertices_for_locality(vertices, faces)
-    faces = reorder_faces_for_locality(faces)
+    vertices, faces = optimize_mesh_pipeline(vertices, faces)
+    locality_mesh = (vertices, faces)
+    if face_order == 'cache':
+        vertices, faces = order_faces_for_vertex_cache(vertices, faces)
+    elif face_order == 'topology':
+        vertices, faces = order_faces_for_topology(vertices, faces)
+    return format_tag, locality_mesh, vertices, faces, resolve_max_error(vertices, max_error, max_rel_error)
+
+
+def build_model_record(input_file, file_counter, model_number, compression, encryptionKey, encryptionMode, vertex_mode, quant_bits, auto_strategy='full', auto_top=2, chunk_size=0, face_order='locality', max_error=None, max_rel_error=None, zstd_dict=None):
+    """Compiles one model into its finished [Header][vertex_data][face_data] record; returns (record, metadata).
+
+    zstd_dict is the raw shared dictionary used by compression mode 8 (see train_zstd_dictionary).
+    """
+    format_tag, locality_mesh, vertices, faces, max_error = prepare_mesh(input_file, face_order, max_error, max_rel_error)
 
     vertex_count = len(vertices)
     face_count = len(faces)
-    vertex_block = pack_vertices(vertices, vertex_mode, quant_bits)
-    face_block = pack_faces(faces, vertex_count)
-    actual_compression, compressed_vertex_block, compressed_face_block = choose_best_compression(vertex_block, face_block, compression)
+    block_stats = []
+    if chunk_size:
+        actual_compression, compressed_vertex_block, compressed_face_block = build_chunked_blocks(vertices, faces, vertex_mode, quant_bits, compression, chunk_size, max_error, zstd_dict, block_stats)
+    else:
+        vertex_block = pack_vertices(vertices, vertex_mode, quant_bits, faces, max_error, block_stats, compression, zstd_dict)
+        face_block = pack_faces(faces, vertex_count, face_order == 'topology')
+        actual_compression, compressed_vertex_block, compressed_face_block = choose_best_compression(vertex_block, face_block, compression, auto_strategy, auto_top, zstd_dict)
+    cache_stats = {}
+    if face_order != 'locality':
+        ordered_size = len(compressed_vertex_block) + len(compressed_face_block)
+        cache_stats = report_face_order(face_order, locality_mesh, (vertices, faces), ordered_size, vertex_mode, quant_bits, actual_compression & COMPRESSION_CODEC_MASK, chunk_size, max_error, zstd_dict)
+    quant_stats = report_quantization(max_error, block_stats) if max_error is not None else {}
     vertex_data = encryptor(compressed_vertex_block, encryptionKey, encryptionMode)
     face_data = encryptor(compressed_face_block, encryptionKey, encryptionMode)
 
     modelName = os.path.splitext(os.path.basename(input_file))[0].encode('utf-8')[:16].ljust(16, b'\x00')
     header = HEADER_STRUCT.pack(format_tag, vertex_count, face_count, actual_compression, file_counter, len(vertex_data), len(face_data), modelName)
-    output_handle.write(header)
-    output_handle.write(vertex_data)
-    output_handle.write(face_data)
 
-    return {
+    return header + vertex_data + face_data, {
         'Model-ID': modelName.decode('utf-8').replace('\x00', ''),
         'Original-Type': os.path.splitext(input_file)[1].lower(),
         'Vertex Count': vertex_count,
         'Face Count': face_count,
-        'Compression': actual_compression,
+        'Compression': actual_compression & COMPRESSION_CODEC_MASK,
+        'Chunk Size': chunk_size or None,
+        'Face Order': face_order,
+        **cache_stats,
         'Vertex Mode': vertex_mode,
-        'Quant Bits': quant_bits if vertex_mode.lower() == 'quantized' else None,
+        'Quant Bits': quant_bits if vertex_mode.lower() in ('quantized', 'predicted') else None,
+        **quant_stats,
         'Number of Models': file_counter,
         'Model Number': model_number,
         'Vertex Length': len(vertex_data),
@@ -525,35 +1936,425 @@ def encode_model(input_file, output_handle, file_counter, model_number, compress
     }
 
 
-def convertFolderToBBM(input_folder: str, output_file: str = None, compression: int = 0, dumpKeys: str = 'False', encryptionKey: str = None, encryptionMode: str = None, vertex_mode: str = 'lossless', quant_bits: int = 14):
+def encode_model(input_file, output_handle, file_counter, model_number, compression, encryptionKey, encryptionMode, vertex_mode, quant_bits, **encode_options):
+    record, metadata = build_model_record(input_file, file_counter, model_number, compression, encryptionKey, encryptionMode, vertex_mode, quant_bits, **encode_options)
+    output_handle.write(record)
+    return metadata
+
+
+def map_models(function, jobs, arg_lists, **kwargs):
+    """Yields function(*args, **kwargs) per entry of arg_lists in order, running up to `jobs` at once in worker processes."""
+    if jobs == 1 or len(arg_lists) < 2:
+        for args in arg_lists:
+            yield function(*args, **kwargs)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs or None) as executor:
+        futures = [executor.submit(function, *args, **kwargs) for args in arg_lists]
+        for future in futures:
+            yield future.result()
+
+
+def model_training_samples(input_file, vertex_mode, quant_bits, chunk_size=0, face_order='locality', max_error=None, max_rel_error=None):
+    """Up to ZSTD_DICT_MODEL_SAMPLES ZSTD_DICT_SAMPLE_SIZE pieces of a model's packed, uncompressed vertex and face
+    blocks (one per chunk when chunked), spread evenly over them, as dictionary training samples."""
+    _, _, vertices, faces, max_error = prepare_mesh(input_file, face_order, max_error, max_rel_error)
+    if chunk_size:
+        blocks = ([pack_vertices(vertices[start:end], vertex_mode, quant_bits, max_error=max_error) for start, end in chunk_ranges(len(vertices), chunk_size)]
+                  + [pack_faces(faces[start:end], len(vertices)) for start, end in chunk_ranges(len(faces), chunk_size)])
+    else:
+        blocks = [pack_vertices(vertices, vertex_mode, quant_bits, faces, max_error), pack_faces(faces, len(vertices), face_order == 'topology')]
+    pieces = [(block, start) for block in blocks for start in range(0, len(block), ZSTD_DICT_SAMPLE_SIZE)]
+    step = -(-len(pieces) // ZSTD_DICT_MODEL_SAMPLES) or 1
+    return [block[start:start + ZSTD_DICT_SAMPLE_SIZE] for block, start in pieces[::step]]
+
+
+def train_zstd_dictionary(model_paths, jobs, vertex_mode, quant_bits, dict_size=None, **encode_options):
+    """Trains one zstd dictionary on ZSTD_DICT_SAMPLE_SIZE pieces of the models' packed blocks.
+
+    Training prepares and packs the models once more before they are encoded, so only an evenly spread subset of
+    at most ZSTD_DICT_TRAINING_MODELS models is sampled, each contributing at most ZSTD_DICT_MODEL_SAMPLES pieces.
+
+    Without dict_size the dictionary is 1/ZSTD_DICT_SAMPLE_RATIO of the sample bytes, at most ZSTD_DICT_SIZE;
+    larger dictionaries mostly repeat the models they were trained on and cost more than they save.
+    Returns the raw dictionary, or None when zstandard is missing or there is too little data to train on.
+    """
+    if zstandard is None:
+        print('Zstd dictionary skipped: zstandard is not installed.')
+        return None
+    pack_options = {key: encode_options[key] for key in ('chunk_size', 'face_order', 'max_error', 'max_rel_error') if key in encode_options}
+    started = time.perf_counter()
+    model_count = len(model_paths)
+    if model_count > ZSTD_DICT_TRAINING_MODELS:
+        model_paths = [model_paths[index * model_count // ZSTD_DICT_TRAINING_MODELS] for index in range(ZSTD_DICT_TRAINING_MODELS)]
+    samples = []
+    for model_samples in map_models(model_training_samples, jobs, [(model_path, vertex_mode, quant_bits) for model_path in model_paths], **pack_options):
+        samples.extend(model_samples)
+    if not dict_size:
+        folder_bytes = sum(map(len, samples)) * model_count // max(len(model_paths), 1)
+        dict_size = max(1024, min(ZSTD_DICT_SIZE, folder_bytes // ZSTD_DICT_SAMPLE_RATIO))
+    try:
+        zstd_dict = zstandard.train_dictionary(dict_size, samples, level=ZSTD_LEVEL).as_bytes()
+    except zstandard.ZstdError as exc:
+        print(f'Zstd dictionary skipped: training on {len(samples)} samples failed ({exc}).')
+        return None
+    print(f'Zstd dictionary: {len(zstd_dict)} bytes trained on {len(samples)} samples ({sum(map(len, samples))} bytes) in {time.perf_counter() - started:.3f}s')
+    return zstd_dict
+
+
+def write_directory(output_handle, entries, zstd_dict=None):
+    """Appends the model directory and its footer. entries = (offset, length, vertex count, face count, compression, name).
+
+    A shared zstd dictionary is stored after the entries as [length (4 bytes)][dictionary] with DIRECTORY_FLAG_ZSTD_DICT set.
+    """
+    directory_offset = output_handle.tell()
+    flags = DIRECTORY_FLAG_ZSTD_DICT if zstd_dict is not None else 0
+    directory = DIRECTORY_HEADER_STRUCT.pack(DIRECTORY_MAGIC, DIRECTORY_VERSION, flags, len(entries))
+    directory += b''.join(DIRECTORY_ENTRY_STRUCT.pack(*entry) for entry in entries)
+    if zstd_dict is not None:
+        directory += struct.pack('<I', len(zstd_dict)) + zstd_dict
+    output_handle.write(directory)
+    output_handle.write(DIRECTORY_FOOTER_STRUCT.pack(directory_offset, len(directory), DIRECTORY_FOOTER_MAGIC))
+
+
+def directory_entry(offset, record):
+    _, vertex_count, face_count, compression, _, vertex_len, face_len, name = HEADER_STRUCT.unpack_from(record)
+    return offset, HEADER_SIZE + vertex_len + face_len, vertex_count, face_count, compression, name
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_identity(file_path: str):
+    stat = os.stat(file_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def encode_settings(compression, encryptionKey, encryptionMode, vertex_mode, quant_bits, zstd_dict_size, dedup=True, **encode_options):
+    """Everything besides the source bytes that decides a model's record; the key is only kept as a fingerprint."""
+    key_fingerprint = hashlib.sha256(f'{encryptionMode}\0{encryptionKey}'.encode()).hexdigest()[:16] if encryptionKey is not None else None
+    return {'compression': compression, 'encryption': encryptionMode, 'key': key_fingerprint, 'vertex_mode': vertex_mode,
+            'quant_bits': quant_bits, 'zstd_dict_size': zstd_dict_size, 'dedup': dedup, **{name: encode_options[name] for name in sorted(encode_options)}}
+
+
+def manifest_path_for(output_file: str) -> str:
+    return os.path.splitext(output_file)[0] + '.manifest.json'
+
+
+def load_manifest(output_file: str, settings):
+    """Returns {source name: manifest entry} of the previous build when its archive is unchanged and it used the
+    same settings, else {} (everything is re-encoded)."""
+    try:
+        with open(manifest_path_for(output_file)) as f:
+            manifest = json.load(f)
+        if manifest.get('version') != MANIFEST_VERSION or manifest.get('settings') != settings or manifest.get('archive') != file_identity(output_file):
+            return {}
+        return manifest['models']
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def source_hash(model_path: str, previous):
+    """Content hash of a source model; reuses the manifest hash when size and mtime are unchanged."""
+    identity = file_identity(model_path)
+    if previous is not None and previous.get('source') == identity:
+        return previous['sha256'], identity
+    return file_sha256(model_path), identity
+
+
+def copy_block(source, output_handle, offset: int, length: int):
+    """Streams length bytes at offset of source into output_handle."""
+    source.seek(offset)
+    remaining = length
+    while remaining > 0:
+        block = source.read(min(COPY_BUFFER_SIZE, remaining))
+        if not block:
+            raise ValueError('Previous archive ends inside a model record')
+        output_handle.write(block)
+        remaining -= len(block)
+
+
+def block_sha256(source, offset: int, length: int) -> bytes:
+    source.seek(offset)
+    digest = hashlib.sha256()
+    remaining = length
+    while remaining > 0:
+        block = source.read(min(COPY_BUFFER_SIZE, remaining))
+        if not block:
+            raise ValueError('Previous archive ends inside a model record')
+        digest.update(block)
+        remaining -= len(block)
+    return digest.digest()
+
+
+def copy_record_with_references(source, output_handle, offset: int, file_counter: int, moved, stored_blocks=None):
+    """Streams an existing [Header][Data] record into output_handle, updating its Number of Models field and
+    keeping its reference blocks valid in the new file.
+
+    moved maps the (offset, length) of every stored block of source already written to output_handle to its new
+    offset and gains this record's blocks. References to moved blocks are remapped, references to data that was
+    not copied (e.g. into deleted records) get the data itself, and blocks already written by such a reference
+    become references to it. With stored_blocks (see dedup_record) blocks already in the output become references
+    too and the blocks written in full are added. Returns the new header.
+    """
+    source.seek(offset)
+    fields = list(HEADER_STRUCT.unpack(source.read(HEADER_SIZE)))
+    codec_bits = fields[3] & (COMPRESSION_CODEC_MASK | COMPRESSION_CHUNKED)
+    blocks = []
+    start = offset + HEADER_SIZE
+    for index, bit in ((5, COMPRESSION_VERTEX_REF), (6, COMPRESSION_FACE_REF)):
+        span = (start, fields[index])
+        if fields[3] & bit:
+            source.seek(start)
+            span = BLOCK_REFERENCE_STRUCT.unpack(source.read(BLOCK_REFERENCE_STRUCT.size))
+        start += fields[index]
+        key = (codec_bits, block_sha256(source, *span)) if stored_blocks is not None and span not in moved else None
+        if span in moved:
+            target = (moved[span], span[1])
+        else:
+            target = stored_blocks.get(key) if key is not None else None
+        if target is not None and span[1] > BLOCK_REFERENCE_STRUCT.size:
+            moved[span] = target[0]
+            fields[3] |= bit
+            fields[index] = BLOCK_REFERENCE_STRUCT.size
+        else:
+            target = None
+            fields[3] &= ~bit
+            fields[index] = span[1]
+        blocks.append((span, target, key))
+    fields[4] = file_counter
+    header = HEADER_STRUCT.pack(*fields)
+    output_handle.write(header)
+    for span, target, key in blocks:
+        if target is not None:
+            output_handle.write(BLOCK_REFERENCE_STRUCT.pack(*target))
+            continue
+        new_offset = output_handle.tell()
+        copy_block(source, output_handle, *span)
+        moved.setdefault(span, new_offset)
+        if key is not None:
+            stored_blocks.setdefault(key, (new_offset, span[1]))
+    return header
+
+
+def scan_records(f):
+    """Walks the [Header][Data] chain; returns [(offset, length, header fields)] for every record, tombstones included."""
+    f.seek(0, os.SEEK_END)
+    file_size = f.tell()
+    f.seek(0)
+    first = f.read(HEADER_SIZE)
+    if len(first) < HEADER_SIZE:
+        return []
+    records = []
+    offset = 0
+    for _ in range(max(HEADER_STRUCT.unpack(first)[4], 1)):
+        f.seek(offset)
+        fields = HEADER_STRUCT.unpack(f.read(HEADER_SIZE))
+        length = HEADER_SIZE + fields[5] + fields[6]
+        if offset + length > file_size:
+            raise ValueError('Archive ends inside a model record')
+        records.append((offset, length, fields))
+        offset += length
+    return records
+
+
+def read_archive(f):
+    """Returns (records, entries, zstd_dict): every record of the chain (see scan_records), the live models as
+    directory entries in directory order (chain order without a directory) and the shared zstd dictionary."""
+    records = scan_records(f)
+    end = records[-1][0] + records[-1][1] if records else 0
+    f.seek(0, os.SEEK_END)
+    file_size = f.tell()
+    if file_size >= end + DIRECTORY_HEADER_STRUCT.size + DIRECTORY_FOOTER_STRUCT.size:
+        f.seek(file_size - DIRECTORY_FOOTER_STRUCT.size)
+        directory_offset, directory_len, magic = DIRECTORY_FOOTER_STRUCT.unpack(f.read(DIRECTORY_FOOTER_STRUCT.size))
+        if magic == DIRECTORY_FOOTER_MAGIC and directory_offset == end and directory_offset + directory_len + DIRECTORY_FOOTER_STRUCT.size == file_size:
+            f.seek(directory_offset)
+            directory = f.read(directory_len)
+            magic, _, flags, count = DIRECTORY_HEADER_STRUCT.unpack_from(directory)
+            if magic == DIRECTORY_MAGIC:
+                entries_end = DIRECTORY_HEADER_STRUCT.size + count * DIRECTORY_ENTRY_STRUCT.size
+                entries = list(DIRECTORY_ENTRY_STRUCT.iter_unpack(directory[DIRECTORY_HEADER_STRUCT.size:entries_end]))
+                zstd_dict = None
+                if flags & DIRECTORY_FLAG_ZSTD_DICT:
+                    (length,) = struct.unpack_from('<I', directory, entries_end)
+                    zstd_dict = directory[entries_end + 4:entries_end + 4 + length]
+                return records, entries, zstd_dict
+    entries = [(offset, length, fields[1], fields[2], fields[3], fields[7]) for offset, length, fields in records if not fields[3] & COMPRESSION_TOMBSTONE]
+    return records, entries, None
+
+
+def dedup_record(record: bytes, offset: int, stored_blocks):
+    """Replaces vertex/face data that is already stored in the archive with BLOCK_REFERENCE_STRUCT references.
+
+    stored_blocks maps (codec bits, sha256 of the stored data) to the (offset, length) of its first copy in the
+    output and gains this record's new blocks; offset is where the record will be written. Returns the record and
+    the names of the blocks that became references.
+    """
+    fields = list(HEADER_STRUCT.unpack_from(record))
+    codec_bits = fields[3] & (COMPRESSION_CODEC_MASK | COMPRESSION_CHUNKED)
+    blocks = [record[HEADER_SIZE:HEADER_SIZE + fields[5]], record[HEADER_SIZE + fields[5]:HEADER_SIZE + fields[5] + fields[6]]]
+    shared = []
+    start = offset + HEADER_SIZE
+    for index, bit, label in ((0, COMPRESSION_VERTEX_REF, 'vertex'), (1, COMPRESSION_FACE_REF, 'face')):
+        key = (codec_bits, hashlib.sha256(blocks[index]).digest())
+        if key in stored_blocks and len(blocks[index]) > BLOCK_REFERENCE_STRUCT.size:
+            blocks[index] = BLOCK_REFERENCE_STRUCT.pack(*stored_blocks[key])
+            fields[3] |= bit
+            shared.append(label)
+        else:
+            stored_blocks.setdefault(key, (start, len(blocks[index])))
+        start += len(blocks[index])
+    if not shared:
+        return record, shared
+    fields[5], fields[6] = len(blocks[0]), len(blocks[1])
+    return HEADER_STRUCT.pack(*fields) + blocks[0] + blocks[1], shared
+
+
+def read_archive_dictionary(archive_path: str):
+    """Shared zstd dictionary stored in an existing archive's directory, or None."""
+    try:
+        with open(archive_path, 'rb') as f:
+            return read_archive(f)[2]
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def convertFolderToBBM(input_folder: str, output_file: str = None, compression: int = 0, dumpKeys: str = 'False', encryptionKey: str = None, encryptionMode: str = None, vertex_mode: str = 'lossless', quant_bits: int = 14, jobs: int = 1, zstd_dict_size: int = 0, incremental: bool = False, dedup: bool = True, **encode_options):
+    """zstd_dict_size trains a shared zstd dictionary of that size for mode 8 (mode 6 then tries it too); mode 8
+    alone sizes the dictionary from the packed data (see train_zstd_dictionary).
+
+    incremental keeps a <output>.manifest.json of source hashes and settings; on the next run the records of
+    unchanged models are copied from the previous archive and only changed or new models are encoded.
+
+    dedup encodes byte-identical source files once and stores vertex/face data that is already in the archive as
+    a reference to the first copy (see dedup_record).
+    """
     model_paths = [os.path.join(input_folder, name) for name in os.listdir(input_folder) if os.path.splitext(name)[1].lower() in {'.obj', '.ply', '.stl'}]
     fileCounter = len(model_paths)
     if output_file is None:
         output_file = os.path.join('.', os.path.basename(input_folder) + '.bbm')
     jsonFile = os.path.splitext(output_file)[0] + '.json'
 
+    settings = encode_settings(compression, encryptionKey, encryptionMode, vertex_mode, quant_bits, zstd_dict_size, dedup, **encode_options)
+    previous = load_manifest(output_file, settings) if incremental else {}
+    sources = {}
+    reused = {}
+    for model_path in model_paths:
+        name = os.path.basename(model_path)
+        if incremental or dedup:
+            sources[name] = source_hash(model_path, previous.get(name))
+        if incremental and name in previous and previous[name]['sha256'] == sources[name][0]:
+            reused[model_path] = previous[name]
+    changed = [model_path for model_path in model_paths if model_path not in reused]
+    duplicates = {}
+    if dedup:
+        originals = {}
+        for model_path in changed:
+            source_key = (sources[os.path.basename(model_path)][0], os.path.splitext(model_path)[1].lower())
+            if source_key in originals:
+                duplicates[model_path] = originals[source_key]
+            else:
+                originals[source_key] = model_path
+    if incremental:
+        print(f'Incremental build: {len(reused)} unchanged, {len(changed) - len(duplicates)} to encode')
+    elif duplicates:
+        print(f'Deduplicated sources: {len(duplicates)} of {len(model_paths)} models are copies of another model')
+
+    zstd_dict = None
+    if compression == ZSTD_DICT_MODE or (compression == 6 and zstd_dict_size):
+        if reused:
+            zstd_dict = read_archive_dictionary(output_file)  # copied mode 8 records were compressed with it
+        if zstd_dict is None and changed:
+            zstd_dict = train_zstd_dictionary(changed if reused else model_paths, jobs, vertex_mode, quant_bits, zstd_dict_size, **encode_options)
+        if zstd_dict is None and compression == ZSTD_DICT_MODE:
+            compression = 3
+
     jsonEntries = []
-    with open(output_file, 'wb') as f:
-        for idx, model_path in enumerate(model_paths, start=1):
-            metadata = encode_model(model_path, f, fileCounter, idx, compression, encryptionKey, encryptionMode, vertex_mode, quant_bits)
-            print(f'BBM Model #{idx} ({os.path.basename(model_path)}), compiled into: {output_file}')
-            jsonEntries.append(metadata)
+    directoryEntries = []
+    models = {}
+    build_path = output_file + '.tmp' if reused else output_file
+    source = open(output_file, 'rb') if reused else None
+    try:
+        with open(build_path, 'wb') as f:
+            arg_lists = [(model_path, fileCounter, model_paths.index(model_path) + 1, compression, encryptionKey, encryptionMode, vertex_mode, quant_bits) for model_path in changed if model_path not in duplicates]
+            records = map_models(build_model_record, jobs, arg_lists, zstd_dict=zstd_dict, **encode_options)
+            originals = {}
+            stored_blocks = {}
+            moved = {}
+            for idx, model_path in enumerate(model_paths, start=1):
+                offset = f.tell()
+                name = os.path.basename(model_path)
+                if model_path in reused:
+                    entry = reused[model_path]
+                    header = copy_record_with_references(source, f, entry['offset'], fileCounter, moved, stored_blocks if dedup else None)
+                    metadata = {key: value for key, value in entry['metadata'].items() if key != 'Shared Blocks'}
+                    metadata.update({'Number of Models': fileCounter, 'Model Number': idx})
+                    if dedup:
+                        compression_bits, _, vertex_len, face_len = HEADER_STRUCT.unpack(header)[3:7]
+                        metadata.update({'Vertex Length': vertex_len, 'Face Length': face_len})
+                        shared = [label for bit, label in ((COMPRESSION_VERTEX_REF, 'vertex'), (COMPRESSION_FACE_REF, 'face')) if compression_bits & bit]
+                        if shared:
+                            metadata['Shared Blocks'] = shared
+                    directoryEntries.append(directory_entry(offset, header))
+                    print(f'BBM Model #{idx} ({name}), copied unchanged into: {output_file}')
+                else:
+                    if model_path in duplicates:
+                        record, metadata = originals[duplicates[model_path]]
+                        modelName = os.path.splitext(name)[0].encode('utf-8')[:16].ljust(16, b'\x00')
+                        record = record[:HEADER_NAME_OFFSET] + modelName + record[HEADER_SIZE:]
+                        metadata = {**metadata, 'Model-ID': modelName.decode('utf-8').replace('\x00', ''), 'Model Number': idx}
+                        action = f'deduplicated ({os.path.basename(duplicates[model_path])}) into'
+                    else:
+                        record, metadata = next(records)
+                        if model_path in duplicates.values():
+                            originals[model_path] = (record, metadata)
+                        action = 'compiled into'
+                    if dedup:
+                        record, shared = dedup_record(record, offset, stored_blocks)
+                        vertex_len, face_len = HEADER_STRUCT.unpack_from(record)[5:7]
+                        metadata = {**metadata, 'Vertex Length': vertex_len, 'Face Length': face_len}
+                        if shared:
+                            metadata['Shared Blocks'] = shared
+                    f.write(record)
+                    directoryEntries.append(directory_entry(offset, record))
+                    print(f'BBM Model #{idx} ({name}), {action}: {output_file}')
+                jsonEntries.append(metadata)
+                if incremental:
+                    models[name] = {'sha256': sources[name][0], 'source': sources[name][1], 'offset': offset, 'length': directoryEntries[-1][1], 'metadata': metadata}
+            uses_dict = any(entry[4] & COMPRESSION_CODEC_MASK == ZSTD_DICT_MODE for entry in directoryEntries)
+            write_directory(f, directoryEntries, zstd_dict if uses_dict else None)
+    finally:
+        if source is not None:
+            source.close()
+    if build_path != output_file:
+        os.replace(build_path, output_file)
+
+    if incremental:
+        with open(manifest_path_for(output_file), 'w') as f:
+            json.dump({'version': MANIFEST_VERSION, 'settings': settings, 'archive': file_identity(output_file), 'models': models}, f, indent=4)
 
     if dumpKeys.lower() == 'true':
         with open(jsonFile, 'w') as dumpJSON:
             json.dump(jsonEntries, dumpJSON, indent=4)
 
 
-def convertFileToBBM(input_file: str, output_file: str = None, compression: int = 0, dumpKeys: str = 'False', encryptionKey: str = None, encryptionMode: str = None, vertex_mode: str = 'lossless', quant_bits: int = 14):
+def convertFileToBBM(input_file: str, output_file: str = None, compression: int = 0, dumpKeys: str = 'False', encryptionKey: str = None, encryptionMode: str = None, vertex_mode: str = 'lossless', quant_bits: int = 14, jobs: int = 1, zstd_dict_size: int = 0, incremental: bool = False, dedup: bool = True, **encode_options):
     if os.path.isdir(input_file):
-        return convertFolderToBBM(input_file, output_file, compression, dumpKeys, encryptionKey, encryptionMode, vertex_mode, quant_bits)
+        return convertFolderToBBM(input_file, output_file, compression, dumpKeys, encryptionKey, encryptionMode, vertex_mode, quant_bits, jobs, zstd_dict_size, incremental, dedup, **encode_options)
+    if compression == ZSTD_DICT_MODE:
+        raise ValueError('Compression mode 8 shares a dictionary across the models of a folder; use mode 3 for a single model.')
 
     if output_file is None:
         root, _ = os.path.splitext(input_file)
         output_file = root + '.bbm'
 
     with open(output_file, 'wb') as f:
-        metadata = encode_model(input_file, f, 1, 1, compression, encryptionKey, encryptionMode, vertex_mode, quant_bits)
+        metadata = encode_model(input_file, f, 1, 1, compression, encryptionKey, encryptionMode, vertex_mode, quant_bits, **encode_options)
 
     if dumpKeys.lower() == 'true':
         jsonFile = os.path.splitext(output_file)[0] + '.json'
@@ -561,15 +2362,209 @@ def convertFileToBBM(input_file: str, output_file: str = None, compression: int
             json.dump(metadata, dumpJSON, indent=4)
 
 
+def rewrite_archive_tail(f, records, entries, zstd_dict):
+    """Rewrites the directory right after the last record and truncates whatever followed it."""
+    f.seek(records[-1][0] + records[-1][1] if records else 0)
+    uses_dict = any(entry[4] & COMPRESSION_CODEC_MASK == ZSTD_DICT_MODE for entry in entries)
+    write_directory(f, entries, zstd_dict if uses_dict else None)
+    f.truncate()
+
+
+def patch_header_field(f, offset: int, field_offset: int, value: int):
+    f.seek(offset + field_offset)
+    f.write(struct.pack('<H', value))
+
+
+def find_archive_entry(entries, model):
+    """Position of a live model in the directory, by index (int) or name (str; digits fall back to the index)."""
+    if isinstance(model, str):
+        for position, entry in enumerate(entries):
+            if entry[5].rstrip(b'\x00').decode('utf-8', errors='ignore') == model:
+                return position
+        if not model.isdigit():
+            raise KeyError(f'No model named {model!r}')
+        model = int(model)
+    if not 0 <= model < len(entries):
+        raise IndexError(f'Model index {model} out of range (archive holds {len(entries)} models)')
+    return model
+
+
+def append_archive_record(f, records, entries, zstd_dict, input_file, compression, encryptionKey, encryptionMode, vertex_mode, quant_bits, name=None, **encode_options):
+    """Encodes input_file and writes its record after the last one, followed by the new directory.
+
+    Header fields of the other records are only patched afterwards, so an interrupted edit leaves either the
+    old header chain or the new directory readable. Returns (new record, metadata).
+    """
+    if compression == ZSTD_DICT_MODE and zstd_dict is None:
+        raise ValueError('This archive has no zstd dictionary for compression mode 8; use mode 3.')
+    record_count = len(records) + 1
+    record, metadata = build_model_record(input_file, record_count, record_count, compression, encryptionKey, encryptionMode, vertex_mode, quant_bits, zstd_dict=zstd_dict, **encode_options)
+    if name is not None:
+        record = bytearray(record)
+        record[HEADER_NAME_OFFSET:HEADER_SIZE] = name
+        record = bytes(record)
+        metadata['Model-ID'] = name.rstrip(b'\x00').decode('utf-8', errors='ignore')
+    offset = records[-1][0] + records[-1][1] if records else 0
+    f.seek(offset)
+    f.write(record)
+    records.append((offset, len(record), HEADER_STRUCT.unpack_from(record)))
+    return record, metadata
+
+
+def appendModel(archive_path: str, input_file: str, compression: int = 0, encryptionKey: str = None, encryptionMode: str = None, vertex_mode: str = 'lossless', quant_bits: int = 14, **encode_options):
+    """Adds one model to an existing archive, writing only its record, the directory and the header model counts."""
+    with open(archive_path, 'r+b') as f:
+        records, entries, zstd_dict = read_archive(f)
+        name = os.path.splitext(os.path.basename(input_file))[0]
+        if any(entry[5] == name.encode('utf-8')[:16].ljust(16, b'\x00') for entry in entries):
+            raise ValueError(f'Archive already holds a model named {name!r}; use replace')
+        record, metadata = append_archive_record(f, records, entries, zstd_dict, input_file, compression, encryptionKey, encryptionMode, vertex_mode, quant_bits, **encode_options)
+        entries.append(directory_entry(records[-1][0], record))
+        rewrite_archive_tail(f, records, entries, zstd_dict)
+        for offset, _, _ in records[:-1]:
+            patch_header_field(f, offset, HEADER_MODEL_COUNT_OFFSET, len(records))
+    print(f'BBM Model {metadata["Model-ID"]} appended to: {archive_path}')
+    return metadata
+
+
+def replaceModel(archive_path: str, model, input_file: str, compression: int = 0, encryptionKey: str = None, encryptionMode: str = None, vertex_mode: str = 'lossless', quant_bits: int = 14, **encode_options):
+    """Appends a new record for a model (keeping its name and directory position) and tombstones the old record."""
+    with open(archive_path, 'r+b') as f:
+        records, entries, zstd_dict = read_archive(f)
+        position = find_archive_entry(entries, model)
+        old_offset, _, _, _, _, name = entries[position]
+        record, metadata = append_archive_record(f, records, entries, zstd_dict, input_file, compression, encryptionKey, encryptionMode, vertex_mode, quant_bits, name=name, **encode_options)
+        entries[position] = directory_entry(records[-1][0], record)
+        rewrite_archive_tail(f, records, entries, zstd_dict)
+        for offset, _, fields in records[:-1]:
+            if offset == old_offset:
+                patch_header_field(f, offset, HEADER_COMPRESSION_OFFSET, fields[3] | COMPRESSION_TOMBSTONE)
+            patch_header_field(f, offset, HEADER_MODEL_COUNT_OFFSET, len(records))
+    print(f'BBM Model {metadata["Model-ID"]} replaced in: {archive_path}')
+    return metadata
+
+
+def deleteModel(archive_path: str, model):
+    """Drops a model from the directory and tombstones its record; compactArchive reclaims the space.
+
+    The last live model cannot be deleted: a .bbm file always holds at least one model.
+    """
+    with open(archive_path, 'r+b') as f:
+        records, entries, zstd_dict = read_archive(f)
+        position = find_archive_entry(entries, model)
+        if len(entries) == 1:
+            raise ValueError(f'Cannot delete the only model left in {archive_path}; remove the file instead')
+        offset, length, _, _, compression, name = entries.pop(position)
+        rewrite_archive_tail(f, records, entries, zstd_dict)
+        patch_header_field(f, offset, HEADER_COMPRESSION_OFFSET, compression | COMPRESSION_TOMBSTONE)
+    model_id = name.rstrip(b'\x00').decode('utf-8', errors='ignore')
+    print(f'BBM Model {model_id} deleted from: {archive_path} ({length} bytes dead until compaction)')
+
+
+def compactArchive(archive_path: str, output_file: str = None):
+    """Streams the live records into a new archive (in place when output_file is None); returns the bytes reclaimed.
+
+    Reference blocks are remapped to the new offsets and only references into dead records get their data copied
+    (see copy_record_with_references); archives holding references are deduplicated again on the way.
+    """
+    target = output_file or archive_path + '.tmp'
+    with open(archive_path, 'rb') as source:
+        records, entries, zstd_dict = read_archive(source)
+        has_references = any(fields[3] & (COMPRESSION_VERTEX_REF | COMPRESSION_FACE_REF) for _, _, fields in records)
+        with open(target, 'wb') as f:
+            compacted = []
+            moved = {}
+            stored_blocks = {} if has_references else None
+            for entry in entries:
+                new_offset = f.tell()
+                header = copy_record_with_references(source, f, entry[0], len(entries), moved, stored_blocks)
+                compacted.append(directory_entry(new_offset, header))
+            uses_dict = any(entry[4] & COMPRESSION_CODEC_MASK == ZSTD_DICT_MODE for entry in compacted)
+            write_directory(f, compacted, zstd_dict if uses_dict else None)
+            new_size = f.tell()
+        old_size = source.seek(0, os.SEEK_END)
+    if output_file is None:
+        os.replace(target, archive_path)
+    print(f'Compacted {archive_path}: {len(records)} records -> {len(entries)}, {old_size} -> {new_size} bytes')
+    return old_size - new_size
+
+
+def parseOptions(argv, known=COMMAND_OPTIONS):
+    """Splits `--name value` / `--name=value` / bare `--flag` options out of argv; returns (positional, options).
+
+    known maps each accepted option to its number of values (see COMMAND_OPTIONS); a bare flag is stored as 'true'
+    and never takes the next argument. Unknown options and missing values raise ValueError.
+    """
+    positional = []
+    options = {}
+    index = 0
+    while index < len(argv):
+        arg = argv[index]
+        index += 1
+        if not arg.startswith('--'):
+            positional.append(arg)
+            continue
+        name, has_value, value = arg[2:].partition('=')
+        if name not in known:
+            raise ValueError(f'Unknown option --{name}')
+        if not has_value and known[name]:
+            if index == len(argv) or argv[index].startswith('--'):
+                raise ValueError(f'Option --{name} needs a value')
+            value = argv[index]
+            index += 1
+        options[name] = value if has_value or known[name] else 'true'
+    return positional, options
+
+
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
+    try:
+        args, options = parseOptions(sys.argv[1:])
+    except ValueError as exc:
+        print(exc)
+        helpMessage()
+    if len(args) < 1:
         helpMessage()
-    inputModel = str(sys.argv[1])
-    outputBbmFile = str(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[2] != 'None' else None
-    compressionMode = int(sys.argv[3]) if len(sys.argv) > 3 else 0
-    dumpModelKeys = str(sys.argv[4]) if len(sys.argv) > 4 else 'False'
-    encryptionMode = str(sys.argv[5]) if len(sys.argv) > 5 and sys.argv[5] != 'None' else None
-    encryptionKey = str(sys.argv[6]) if len(sys.argv) > 6 and sys.argv[6] != 'None' else None
-    vertexMode = str(sys.argv[7]) if len(sys.argv) > 7 else 'lossless'
-    quantBits = int(sys.argv[8]) if len(sys.argv) > 8 else 14
-    convertFileToBBM(inputModel, outputBbmFile, compressionMode, dumpModelKeys, encryptionKey, encryptionMode, vertexMode, quantBits)
+    command = args.pop(0) if args[0] in ARCHIVE_COMMANDS else None
+    if command is not None and len(args) < {'append': 2, 'replace': 3, 'delete': 2, 'compact': 1}[command]:
+        helpMessage()
+    if command == 'delete':
+        deleteModel(args[0], args[1])
+        sys.exit(0)
+    if command == 'compact':
+        compactArchive(args[0], args[1] if len(args) > 1 else None)
+        sys.exit(0)
+    if command is not None:
+        # append/replace reuse the compile argument positions: [bbmFile] ([model]) [inputModel] [compressionMode] ...
+        archiveFile, args = args[0], args[1:]
+        targetModel = args.pop(0) if command == 'replace' else None
+        args = [args[0], archiveFile, args[1] if len(args) > 1 else '0', 'False', *args[2:]]
+    inputModel = str(args[0])
+    outputBbmFile = str(args[1]) if len(args) > 1 and args[1] != 'None' else None
+    compressionMode = int(args[2]) if len(args) > 2 else 0
+    dumpModelKeys = str(args[3]) if len(args) > 3 else 'False'
+    encryptionMode = str(args[4]) if len(args) > 4 and args[4] != 'None' else None
+    encryptionKey = str(args[5]) if len(args) > 5 and args[5] != 'None' else None
+    vertexMode = str(args[6]) if len(args) > 6 else 'lossless'
+    quantBits = int(args[7]) if len(args) > 7 else 14
+    jobCount = int(options.get('jobs', 1))
+    encodeOptions = {
+        'auto_strategy': options.get('auto-strategy', 'full'),
+        'auto_top': int(options.get('auto-top', 2)),
+        'chunk_size': int(options.get('chunk-size', 0)),
+        'face_order': options.get('face-order', 'locality'),
+        'max_error': float(options['max-error']) if 'max-error' in options else None,
+        'max_rel_error': float(options['max-rel-error']) if 'max-rel-error' in options else None,
+    }
+    if encodeOptions['chunk_size'] < 0:
+        print(f'--chunk-size must be 0 (off) or a positive number of elements, got {encodeOptions["chunk_size"]}')
+        sys.exit(1)
+    if command == 'append':
+        appendModel(outputBbmFile, inputModel, compressionMode, encryptionKey, encryptionMode, vertexMode, quantBits, **encodeOptions)
+        sys.exit(0)
+    if command == 'replace':
+        replaceModel(outputBbmFile, targetModel, inputModel, compressionMode, encryptionKey, encryptionMode, vertexMode, quantBits, **encodeOptions)
+        sys.exit(0)
+    zstdDictSize = int(options.get('zstd-dict', 0))
+    incremental = options.get('incremental', 'false').lower() not in ('0', 'false', 'no')
+    dedup = options.get('dedup', 'true').lower() not in ('0', 'false', 'no')
+    convertFileToBBM(inputModel, outputBbmFile, compressionMode, dumpModelKeys, encryptionKey, encryptionMode, vertexMode, quantBits, jobCount, zstdDictSize, incremental, dedup, **encodeOptions)
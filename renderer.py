@@ -1,6 +1,4 @@
-import struct, sys, lzma, bz2, zlib, io
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection
-import matplotlib.pyplot as plt
+import struct, sys, os, lzma, bz2, zlib, array, itertools, collections, mmap, threading, hashlib, concurrent.futures
 
 try:
     import lz4.block as lz4_block
@@ -12,6 +10,11 @@ try:
 except ImportError:
     zstandard = None
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 try:
     from Crypto.Cipher import AES, Blowfish, ChaCha20
     from Crypto.Util.Padding import unpad
@@ -25,6 +28,15 @@ HEADER_SIZE = HEADER_STRUCT.size
 multipleModels = []
 modelNames = []
 
+DIRECTORY_MAGIC = b'BBMD'
+DIRECTORY_FOOTER_MAGIC = b'BBMF'
+DIRECTORY_HEADER_STRUCT = struct.Struct('<4sHHI')
+DIRECTORY_ENTRY_STRUCT = struct.Struct('<QQIIH16s')
+DIRECTORY_FOOTER_STRUCT = struct.Struct('<QQ4s')
+DIRECTORY_FLAG_ZSTD_DICT = 0x0001
+ZSTD_DICT_MODE = 8
+ModelEntry = collections.namedtuple('ModelEntry', 'index name offset length vertex_count face_count compression')
+
 VERT_FLOAT32 = 0
 VERT_FLOAT16 = 1
 VERT_FLOAT32_SHUFFLED = 2
@@ -32,6 +44,19 @@ VERT_FLOAT16_SHUFFLED = 3
 VERT_STREAM_FLOAT16 = 4
 VERT_STREAM_FLOAT32 = 5
 VERT_QUANTIZED = 6
+VERT_CHUNKED = 7
+VERT_PREDICTED = 8
+VERT_STREAM_FLOAT32_PREDICTED = 9
+VERT_QUANTIZED_AXES = 10
+QUANTIZED_AXES_HEADER_STRUCT = struct.Struct('<BBBBffffffIII')
+
+FLOAT_PREDICT_NONE = 0
+FLOAT_PREDICT_XOR = 1
+FLOAT_PREDICT_DELTA = 2
+
+PREDICT_PREVIOUS = 0
+PREDICT_PARALLELOGRAM = 1
+PREDICTED_HEADER_STRUCT = struct.Struct('<BBBffffffBBBIII')
 
 FACE_UINT32 = 0
 FACE_UINT16 = 1
@@ -39,6 +64,23 @@ FACE_DELTA_INT32 = 2
 FACE_DELTA_INT16 = 3
 FACE_BITPACKED = 4
 FACE_DELTA_VARINT = 5
+FACE_CHUNKED = 6
+FACE_TOPOLOGY = 7
+
+TOPOLOGY_NEW = 0
+TOPOLOGY_LEFT = 1
+TOPOLOGY_RIGHT = 2
+TOPOLOGY_ESCAPE = 3
+TOPOLOGY_STRUCT = struct.Struct('<BII')
+
+COMPRESSION_CODEC_MASK = 0x00FF
+COMPRESSION_CHUNKED = 0x0100
+COMPRESSION_VERTEX_REF = 0x1000
+COMPRESSION_FACE_REF = 0x2000
+COMPRESSION_TOMBSTONE = 0x8000
+BLOCK_REFERENCE_STRUCT = struct.Struct('<QQ')
+CHUNK_HEADER_STRUCT = struct.Struct('<BII')
+CHUNK_ENTRY_STRUCT = struct.Struct('<III')
 
 
 def decryptor(byteData: bytes, encryptionKey: str = None, encryptionMode: str = None) -> bytes:
@@ -73,7 +115,21 @@ def decryptor(byteData: bytes, encryptionKey: str = None, encryptionMode: str =
     return bytes([byteData[i] ^ key_bytes[i % key_length] for i in range(len(byteData))])
 
 
-def decompressor(data: bytes, compression_flag: int = 0) -> bytes:
+zstd_contexts = threading.local()
+
+
+def zstd_decompressor(zstd_dict: bytes = None):
+    """Per-thread ZstdDecompressor for an optional raw dictionary, built once and reused."""
+    cache = zstd_contexts.__dict__.setdefault('decompressors', {})
+    decompressor = cache.get(zstd_dict)
+    if decompressor is None:
+        dict_data = zstandard.ZstdCompressionDict(zstd_dict) if zstd_dict is not None else None
+        decompressor = cache[zstd_dict] = zstandard.ZstdDecompressor(dict_data=dict_data)
+    return decompressor
+
+
+def decompressor(data: bytes, compression_flag: int = 0, zstd_dict: bytes = None) -> bytes:
+    """zstd_dict is the file's shared dictionary (readZstdDictionary), needed for compression mode 8."""
     if compression_flag == 0:
         return data
     if compression_flag == 1:
@@ -85,14 +141,143 @@ def decompressor(data: bytes, compression_flag: int = 0) -> bytes:
     if compression_flag == 3:
         if zstandard is None:
             raise RuntimeError('zstandard is required to decompress compression mode 3 data.')
-        return zstandard.ZstdDecompressor().decompress(data)
+        return zstd_decompressor().decompress(data)
     if compression_flag == 4:
         return zlib.decompress(data)
     if compression_flag == 5:
         return lzma.decompress(data)
+    if compression_flag == 7:
+        return rans_decode(data)
+    if compression_flag == ZSTD_DICT_MODE:
+        if zstandard is None:
+            raise RuntimeError('zstandard is required to decompress compression mode 8 data.')
+        if zstd_dict is None:
+            raise RuntimeError('Compression mode 8 data needs the zstd dictionary stored in the model directory.')
+        return zstd_decompressor(zstd_dict).decompress(data)
     return data
 
 
+RANS_PROB_BITS = 12
+RANS_PROB_SCALE = 1 << RANS_PROB_BITS
+RANS_LOW = 1 << 16
+RANS_LIST_TABLE_MAX = 64
+
+
+def read_varint(data: bytes, offset: int):
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise ValueError('Truncated varint data')
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def read_rans_table(data: bytes, offset: int):
+    present_count = data[offset] + 1
+    offset += 1
+    if present_count <= RANS_LIST_TABLE_MAX:
+        symbols = []
+        freqs = []
+        for _ in range(present_count):
+            symbols.append(data[offset])
+            freq, offset = read_varint(data, offset + 1)
+            freqs.append(freq + 1)
+    else:
+        bitmap = data[offset:offset + 32]
+        offset += 32
+        symbols = [symbol for symbol in range(256) if bitmap[symbol >> 3] >> (symbol & 7) & 1]
+        freqs = []
+        for _ in symbols:
+            freq, offset = read_varint(data, offset)
+            freqs.append(freq + 1)
+    table = [0] * 256
+    for symbol, freq in zip(symbols, freqs):
+        table[symbol] = freq
+    if len(symbols) != present_count or sum(table) != RANS_PROB_SCALE:
+        raise ValueError('Corrupt rANS frequency table')
+    return table, offset
+
+
+def rans_decode(data: bytes) -> bytes:
+    """Inverse of generator.rans_encode (compression id 7)."""
+    raw_length, offset = read_varint(data, 0)
+    if raw_length == 0:
+        return b''
+    lanes, offset = read_varint(data, offset)
+    segment_count, offset = read_varint(data, offset)
+    lengths = []
+    freqs = []
+    for _ in range(segment_count):
+        length, offset = read_varint(data, offset)
+        table, offset = read_rans_table(data, offset)
+        lengths.append(length)
+        freqs.append(table)
+    if sum(lengths) != raw_length or not 0 < lanes <= raw_length:
+        raise ValueError('Corrupt rANS stream header')
+    cums = [[0, *itertools.accumulate(table[:255])] for table in freqs]
+    slot_symbols = [bytes(symbol for symbol in range(256) for _ in range(table[symbol])) for table in freqs]
+    states_end = offset + 4 * lanes
+    if len(data) < states_end or (len(data) - states_end) % 2:
+        raise ValueError('Truncated rANS stream')
+    slot_mask = RANS_PROB_SCALE - 1
+    if np is not None:
+        states = np.frombuffer(data, dtype='<u4', count=lanes, offset=offset).astype(np.uint64)
+        words = np.frombuffer(data, dtype='<u2', offset=states_end).astype(np.uint64)
+        segment_base = np.repeat(np.arange(segment_count, dtype=np.uint64) << np.uint64(RANS_PROB_BITS), lengths)
+        slot_symbol = np.frombuffer(b''.join(slot_symbols), dtype=np.uint8)
+        slot_freq = np.asarray(freqs, dtype=np.uint64)[np.arange(segment_count).repeat(RANS_PROB_SCALE), slot_symbol]
+        slot_bias = np.tile(np.arange(RANS_PROB_SCALE, dtype=np.uint64), segment_count) - np.asarray(cums, dtype=np.uint64)[np.arange(segment_count).repeat(RANS_PROB_SCALE), slot_symbol]
+        out = np.empty(raw_length, dtype=np.uint8)
+        position = 0
+        for start in range(0, raw_length, lanes):
+            end = min(start + lanes, raw_length)
+            x = states[:end - start]
+            slot = (x & np.uint64(slot_mask)) + segment_base[start:end]
+            symbols = slot_symbol[slot]
+            x = slot_freq[slot] * (x >> np.uint64(RANS_PROB_BITS)) + slot_bias[slot]
+            renorm = x < RANS_LOW
+            need = int(np.count_nonzero(renorm))
+            if need:
+                if position + need > len(words):
+                    raise ValueError('Truncated rANS stream')
+                x[renorm] = (x[renorm] << np.uint64(16)) | words[position:position + need]
+                position += need
+            states[:end - start] = x
+            out[start:end] = symbols
+        if position != len(words):
+            raise ValueError('Corrupt rANS stream')
+        return out.tobytes()
+    states = list(struct.unpack_from(f'<{lanes}I', data, offset))
+    words = struct.unpack_from(f'<{(len(data) - states_end) // 2}H', data, states_end)
+    out = bytearray(raw_length)
+    position = 0
+    base = 0
+    for segment, length in enumerate(lengths):
+        table, cum, slots = freqs[segment], cums[segment], slot_symbols[segment]
+        for k in range(length):
+            i = base + k
+            lane = i % lanes
+            x = states[lane]
+            symbol = slots[x & slot_mask]
+            x = table[symbol] * (x >> RANS_PROB_BITS) + (x & slot_mask) - cum[symbol]
+            if x < RANS_LOW:
+                if position >= len(words):
+                    raise ValueError('Truncated rANS stream')
+                x = (x << 16) | words[position]
+                position += 1
+            states[lane] = x
+            out[i] = symbol
+        base += length
+    if position != len(words):
+        raise ValueError('Corrupt rANS stream')
+    return bytes(out)
+
+
 def readHeader(byteData: bytes):
     format_tag, vertex_count, face_count, compression_flag, numFiles, vertex_len, face_len, modelName = HEADER_STRUCT.unpack(byteData)
     modelName = modelName.decode('utf-8', errors='ignore').replace('\x00', '')
@@ -103,6 +288,8 @@ def readHeader(byteData: bytes):
 def byte_unshuffle(data: bytes, element_size: int) -> bytes:
     if not data or element_size <= 1 or len(data) % element_size != 0:
         return data
+    if np is not None:
+        return np.frombuffer(data, dtype=np.uint8).reshape(element_size, -1).T.tobytes()
     count = len(data) // element_size
     out = bytearray(len(data))
     mv = memoryview(data)
@@ -132,6 +319,38 @@ def _bitunpack(data: bytes, bits_per_value: int, count: int):
     return out
 
 
+def bitunpack_values(data: bytes, bits_per_value: int, count: int):
+    """Bulk version of _bitunpack for 1-32 bit widths (uint32 array with NumPy, list without)."""
+    if bits_per_value <= 0:
+        return np.zeros(count, dtype=np.uint32) if np is not None else [0] * count
+    if bits_per_value > 32:
+        raise ValueError(f'Bit width {bits_per_value} is outside the supported 1-32 range')
+    needed = (count * bits_per_value + 7) // 8
+    data = bytes(data[:needed]).ljust(needed, b'\x00')
+    if np is not None:
+        if bits_per_value in (8, 16, 32):
+            return np.frombuffer(data, dtype=f'<u{bits_per_value // 8}').astype(np.uint32)
+        groups = np.frombuffer(data.ljust(-(-count // 8) * bits_per_value, b'\x00'), dtype=np.uint8).reshape(-1, bits_per_value)
+        groups = np.ascontiguousarray(groups.T, dtype=np.uint64)
+        out = np.zeros((8, groups.shape[1]), dtype=np.uint64)
+        for slot in range(8):
+            first_bit = slot * bits_per_value
+            column = out[slot]
+            for byte in range(first_bit // 8, (first_bit + bits_per_value - 1) // 8 + 1):
+                shift = 8 * byte - first_bit
+                part = groups[byte]
+                column |= part << np.uint64(shift) if shift >= 0 else part >> np.uint64(-shift)
+        return (out.T.ravel()[:count] & np.uint64((1 << bits_per_value) - 1)).astype(np.uint32)
+
+    mask = (1 << bits_per_value) - 1
+    out = []
+    for start in range(0, needed, bits_per_value):
+        acc = int.from_bytes(data[start:start + bits_per_value], 'little')
+        out.extend((acc >> shift) & mask for shift in range(0, 8 * bits_per_value, bits_per_value))
+    del out[count:]
+    return out
+
+
 def zigzag_decode(value: int) -> int:
     return (value >> 1) ^ -(value & 1)
 
@@ -153,7 +372,93 @@ def decode_varints(data: bytes):
     return values
 
 
-def unpack_vertices_legacy(data: bytes):
+VARINT_MAX_BYTES = 10
+
+
+def zigzag_decode_array(values):
+    values = np.asarray(values, dtype=np.uint64)
+    return (values >> np.uint64(1)).view(np.int64) ^ -(values & np.uint64(1)).view(np.int64)
+
+
+def decode_varints_array(data: bytes):
+    """Bulk version of decode_varints; returns a uint64 array."""
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if raw.size and raw[-1] & 0x80:
+        raise ValueError('Truncated varint data')
+    ends = np.flatnonzero(raw < 0x80)
+    starts = np.empty_like(ends)
+    starts[:1] = 0
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts + 1
+    if lengths.size and lengths.max() > VARINT_MAX_BYTES:
+        raise ValueError('Varint data exceeds 64 bits')
+    values = np.zeros(len(ends), dtype=np.uint64)
+    for group in range(int(lengths.max()) if lengths.size else 0):
+        active = lengths > group
+        values[active] |= (raw[starts[active] + group] & np.uint8(0x7F)).astype(np.uint64) << np.uint64(7 * group)
+    return values
+
+
+def vertex_array(xs, ys, zs):
+    """Builds the (N,3) float32 vertex array from three axis columns (flat array.array('f') without NumPy)."""
+    count = min(len(xs), len(ys), len(zs))
+    if np is not None:
+        out = np.empty((count, 3), dtype=np.float32)
+        out[:, 0] = xs[:count]
+        out[:, 1] = ys[:count]
+        out[:, 2] = zs[:count]
+        return out
+    out = array.array('f', [0.0]) * (count * 3)
+    out[0::3] = array.array('f', xs[:count])
+    out[1::3] = array.array('f', ys[:count])
+    out[2::3] = array.array('f', zs[:count])
+    return out
+
+
+def face_array(flat):
+    """Builds the (M,3) uint32 face array from a flat index sequence (flat array.array('I') without NumPy)."""
+    usable = len(flat) - len(flat) % 3
+    if np is not None:
+        flat = np.asarray(flat[:usable])
+        return (flat if flat.dtype == np.uint32 else flat.astype(np.uint32)).reshape(-1, 3)
+    return array.array('I', flat[:usable])
+
+
+def row_count(values) -> int:
+    if np is not None and isinstance(values, np.ndarray):
+        return len(values)
+    return len(values) // 3
+
+
+def rows_as_tuples(values):
+    """Converts a decoded vertex/face array back into the list-of-tuples form."""
+    if np is not None and isinstance(values, np.ndarray):
+        return list(map(tuple, values.tolist()))
+    iterator = iter(values)
+    return list(zip(iterator, iterator, iterator))
+
+
+def decode_values(raw, elem_fmt: str):
+    elem_size = struct.calcsize(elem_fmt)
+    usable = len(raw) - len(raw) % elem_size
+    if np is not None:
+        return np.frombuffer(raw, dtype=np.dtype(elem_fmt), count=usable // elem_size)
+    return struct.unpack(f'{elem_fmt[0]}{usable // elem_size}{elem_fmt[1:]}', raw[:usable])
+
+
+def decode_stream_column(raw, elem_fmt: str):
+    """Decodes one byte-plane shuffled X/Y/Z stream (unshuffled once, not once per element)."""
+    return decode_values(byte_unshuffle(raw, struct.calcsize(elem_fmt)), elem_fmt)
+
+
+def prefix_sum(deltas):
+    """Running sum that turns index deltas back into absolute indices."""
+    if np is not None:
+        return np.cumsum(np.asarray(deltas, dtype=np.int64))
+    return list(itertools.accumulate(deltas))
+
+
+def unpack_vertices_legacy_array(data: bytes):
     flag = data[0]
     payload = data[1:]
     if flag == VERT_FLOAT16_SHUFFLED:
@@ -162,19 +467,125 @@ def unpack_vertices_legacy(data: bytes):
     elif flag == VERT_FLOAT32_SHUFFLED:
         payload = byte_unshuffle(payload, 12)
         flag = VERT_FLOAT32
-    if flag == VERT_FLOAT16:
-        return [struct.unpack('<eee', payload[i:i + 6]) for i in range(0, len(payload), 6)]
-    return [struct.unpack('<fff', payload[i:i + 12]) for i in range(0, len(payload), 12)]
+    values = decode_values(payload, '<e' if flag == VERT_FLOAT16 else '<f')
+    if np is not None and flag == VERT_FLOAT32:
+        return values[:len(values) - len(values) % 3].astype(np.float32, copy=False).reshape(-1, 3)
+    return vertex_array(values[0::3], values[1::3], values[2::3])
+
+
+def unpack_vertices_legacy(data: bytes):
+    return rows_as_tuples(unpack_vertices_legacy_array(data))
+
+
+def prediction_references(faces, vertex_count: int):
+    """Per-vertex (r1, r2, r3) with prediction q[r1] + q[r2] - q[r3]; must match generator.prediction_references."""
+    zero = vertex_count
+    if np is not None:
+        faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+        refs = np.empty((vertex_count, 3), dtype=np.int64)
+        previous = np.arange(vertex_count) - 1
+        previous[:1] = zero
+        refs[:] = previous[:, None]
+        if not len(faces):
+            return refs
+        used, first_pos = np.unique(faces.ravel(), return_index=True)
+        face_idx, corner = first_pos // 3, first_pos % 3
+        u = faces[face_idx, (corner + 1) % 3]
+        w = faces[face_idx, (corner + 2) % 3]
+        edge_keys = np.concatenate([faces[:, 0] * vertex_count + faces[:, 1], faces[:, 1] * vertex_count + faces[:, 2], faces[:, 2] * vertex_count + faces[:, 0]])
+        opposite = np.concatenate([faces[:, 2], faces[:, 0], faces[:, 1]])
+        position = np.concatenate([np.arange(len(faces)) * 3 + 2, np.arange(len(faces)) * 3, np.arange(len(faces)) * 3 + 1])
+        order = np.lexsort((position, edge_keys))
+        sorted_keys = edge_keys[order]
+        lookup = w * vertex_count + u
+        slot = np.minimum(np.searchsorted(sorted_keys, lookup), len(sorted_keys) - 1)
+        d = np.where(sorted_keys[slot] == lookup, opposite[order[slot]], vertex_count)
+        single = np.where(u < used, np.where(w < used, np.maximum(u, w), u), np.where(w < used, w, -1))
+        parallelogram = (u < used) & (w < used) & (d < used)
+        chosen = np.where(parallelogram[:, None], np.stack([u, w, d], axis=1), single[:, None])
+        keep = parallelogram | (single >= 0)
+        refs[used[keep]] = chosen[keep]
+        return refs
+    faces = [tuple(faces[i:i + 3]) for i in range(0, len(faces), 3)] if faces and not isinstance(faces[0], (tuple, list)) else faces
+    refs = [(idx - 1, idx - 1, idx - 1) if idx else (zero, zero, zero) for idx in range(vertex_count)]
+    opposite = {}
+    seen = set()
+    firsts = []
+    for x, y, z in faces:
+        for a, b, c in ((x, y, z), (y, z, x), (z, x, y)):
+            opposite.setdefault((a, b), c)
+            if c not in seen:
+                seen.add(c)
+                firsts.append((c, a, b))
+    for v, u, w in firsts:
+        d = opposite.get((w, u), vertex_count)
+        if u < v and w < v and d < v:
+            refs[v] = (u, w, d)
+        elif u < v or w < v:
+            single = max(u, w) if u < v and w < v else (u if u < v else w)
+            refs[v] = (single, single, single)
+    return refs
 
 
-def unpack_vertices(data: bytes, vertex_count: int):
+def dequantize(qvals, min_v, max_v, max_int):
+    if max_int == 0 or max_v == min_v:
+        return [min_v] * len(qvals)
+    scale = (max_v - min_v) / max_int
+    if np is not None:
+        return min_v + np.asarray(qvals, dtype=np.float64) * scale
+    return [min_v + q * scale for q in qvals]
+
+
+def unpack_predicted_axis(stream, width: int, refs, vertex_count: int):
+    """Adds decoded zigzag residuals to their predictions in vertex order; returns the grid values."""
+    if width:
+        zz = bitunpack_values(stream, width, vertex_count)
+    else:
+        zz = decode_varints_array(stream)[:vertex_count] if np is not None else decode_varints(stream)[:vertex_count]
+    residuals = zigzag_decode_array(zz).tolist() if np is not None else [zigzag_decode(value) for value in zz]
+    grid = [0] * (vertex_count + 1)
+    for v, (r1, r2, r3) in enumerate(refs):
+        grid[v] = residuals[v] + grid[r1] + grid[r2] - grid[r3]
+    return grid[:vertex_count]
+
+
+def unpredict_float_bits(residuals, predictor: int):
+    """Inverse of generator.predict_float_bits; returns float32 values."""
+    if np is not None:
+        residuals = np.asarray(residuals, dtype=np.uint32)
+        if predictor == FLOAT_PREDICT_XOR:
+            residuals = np.bitwise_xor.accumulate(residuals)
+        elif predictor == FLOAT_PREDICT_DELTA:
+            deltas = (residuals >> np.uint32(1)) ^ (np.uint32(0) - (residuals & np.uint32(1)))
+            ordered = np.cumsum(deltas, dtype=np.uint32)
+            residuals = np.where(ordered >> 31, ordered & np.uint32(0x7FFFFFFF), ~ordered).astype(np.uint32)
+        return residuals.view('<f4')
+    bits = []
+    previous = 0
+    for value in residuals:
+        if predictor == FLOAT_PREDICT_XOR:
+            previous ^= value
+            bits.append(previous)
+        elif predictor == FLOAT_PREDICT_DELTA:
+            previous = (previous + zigzag_decode(value)) & 0xFFFFFFFF
+            bits.append(previous & 0x7FFFFFFF if previous >> 31 else ~previous & 0xFFFFFFFF)
+        else:
+            bits.append(value)
+    return struct.unpack(f'<{len(bits)}f', struct.pack(f'<{len(bits)}I', *bits))
+
+
+def unpack_vertices_array(data: bytes, vertex_count: int, faces=None):
+    """Decodes a vertex block into a contiguous (N,3) float32 array, or a flat array.array('f') without NumPy.
+
+    faces (decoded face indices) are required for parallelogram-predicted blocks.
+    """
     if not data:
-        return []
+        return vertex_array([], [], [])
     flag = data[0]
     if flag in {VERT_FLOAT16, VERT_FLOAT32, VERT_FLOAT16_SHUFFLED, VERT_FLOAT32_SHUFFLED}:
-        return unpack_vertices_legacy(data)
+        return unpack_vertices_legacy_array(data)
     if flag in {VERT_STREAM_FLOAT16, VERT_STREAM_FLOAT32}:
-        _, x_len, y_len, z_len = struct.unpack('<BIII', data[:13])
+        _, x_len, y_len, z_len = struct.unpack_from('<BIII', data)
         offset = 13
         xs_raw = data[offset:offset + x_len]
         offset += x_len
@@ -182,13 +593,19 @@ def unpack_vertices(data: bytes, vertex_count: int):
         offset += y_len
         zs_raw = data[offset:offset + z_len]
         elem_fmt = '<e' if flag == VERT_STREAM_FLOAT16 else '<f'
-        elem_size = struct.calcsize(elem_fmt)
-        xs = [struct.unpack(elem_fmt, byte_unshuffle(xs_raw, elem_size)[i:i + elem_size])[0] for i in range(0, x_len, elem_size)]
-        ys = [struct.unpack(elem_fmt, byte_unshuffle(ys_raw, elem_size)[i:i + elem_size])[0] for i in range(0, y_len, elem_size)]
-        zs = [struct.unpack(elem_fmt, byte_unshuffle(zs_raw, elem_size)[i:i + elem_size])[0] for i in range(0, z_len, elem_size)]
-        return list(zip(xs, ys, zs))
+        return vertex_array(decode_stream_column(xs_raw, elem_fmt), decode_stream_column(ys_raw, elem_fmt), decode_stream_column(zs_raw, elem_fmt))
+    if flag == VERT_STREAM_FLOAT32_PREDICTED:
+        _, *fields = struct.unpack_from('<BBBBIII', data)
+        predictors, lengths = fields[:3], fields[3:]
+        offset = 16
+        columns = []
+        for predictor, length in zip(predictors, lengths):
+            residuals = decode_stream_column(data[offset:offset + length], '<I')
+            offset += length
+            columns.append(unpredict_float_bits(residuals, predictor))
+        return vertex_array(*columns)
     if flag == VERT_QUANTIZED:
-        _, bits, min_x, max_x, min_y, max_y, min_z, max_z, len_x, len_y, len_z = struct.unpack('<BBffffffIII', data[:38])
+        _, bits, min_x, max_x, min_y, max_y, min_z, max_z, len_x, len_y, len_z = struct.unpack_from('<BBffffffIII', data)
         offset = 38
         pack_x = data[offset:offset + len_x]
         offset += len_x
@@ -196,98 +613,613 @@ def unpack_vertices(data: bytes, vertex_count: int):
         offset += len_y
         pack_z = data[offset:offset + len_z]
         max_int = (1 << bits) - 1
-        qx = _bitunpack(pack_x, bits, vertex_count)
-        qy = _bitunpack(pack_y, bits, vertex_count)
-        qz = _bitunpack(pack_z, bits, vertex_count)
-
-        def dequantize(qvals, min_v, max_v):
-            if max_int == 0 or max_v == min_v:
-                return [min_v] * len(qvals)
-            scale = (max_v - min_v) / max_int
-            return [min_v + q * scale for q in qvals]
-
-        xs = dequantize(qx, min_x, max_x)
-        ys = dequantize(qy, min_y, max_y)
-        zs = dequantize(qz, min_z, max_z)
-        return list(zip(xs, ys, zs))
+        qx = bitunpack_values(pack_x, bits, vertex_count)
+        qy = bitunpack_values(pack_y, bits, vertex_count)
+        qz = bitunpack_values(pack_z, bits, vertex_count)
+        return vertex_array(dequantize(qx, min_x, max_x, max_int), dequantize(qy, min_y, max_y, max_int), dequantize(qz, min_z, max_z, max_int))
+    if flag == VERT_QUANTIZED_AXES:
+        _, *fields = QUANTIZED_AXES_HEADER_STRUCT.unpack_from(data)
+        widths, bounds, lengths = fields[:3], fields[3:9], fields[9:]
+        offset = QUANTIZED_AXES_HEADER_STRUCT.size
+        columns = []
+        for axis in range(3):
+            quantized = bitunpack_values(data[offset:offset + lengths[axis]], widths[axis], vertex_count)
+            offset += lengths[axis]
+            columns.append(dequantize(quantized, bounds[2 * axis], bounds[2 * axis + 1], (1 << widths[axis]) - 1))
+        return vertex_array(*columns)
+    if flag == VERT_PREDICTED:
+        _, bits, predictor, *fields = PREDICTED_HEADER_STRUCT.unpack_from(data)
+        bounds, widths, lengths = fields[:6], fields[6:9], fields[9:]
+        if predictor == PREDICT_PARALLELOGRAM and faces is None:
+            raise ValueError('Parallelogram-predicted vertices need the decoded faces')
+        refs = prediction_references(faces if predictor == PREDICT_PARALLELOGRAM else [], vertex_count)
+        refs = refs.tolist() if np is not None else refs
+        max_int = (1 << bits) - 1
+        offset = PREDICTED_HEADER_STRUCT.size
+        columns = []
+        for axis in range(3):
+            stream = data[offset:offset + lengths[axis]]
+            offset += lengths[axis]
+            grid = unpack_predicted_axis(stream, widths[axis], refs, vertex_count)
+            columns.append(dequantize(grid, bounds[2 * axis], bounds[2 * axis + 1], max_int))
+        return vertex_array(*columns)
     raise ValueError(f'Unknown vertex packing flag: {flag}')
 
 
-def unpack_faces(data: bytes):
+def unpack_vertices(data: bytes, vertex_count: int, faces=None):
+    return rows_as_tuples(unpack_vertices_array(data, vertex_count, faces))
+
+
+def decode_topology_faces(face_count: int, symbols, aux):
+    """Rebuilds faces from a topology symbol stream (see generator.topology_traversal); returns a flat index list."""
+    symbols = iter(symbols.tolist() if np is not None and isinstance(symbols, np.ndarray) else symbols)
+    aux = iter(aux)
+    flat = []
+    decoded = set()
+    boundary_in = {}
+    boundary_out = {}
+    stack = []
+    next_label = 0
+
+    def add_face(x, y, z):
+        flat.extend((x, y, z))
+        for u, v in ((x, y), (y, z), (z, x)):
+            decoded.add((u, v))
+            if (v, u) in decoded:
+                del boundary_out[v][u]
+                del boundary_in[u][v]
+            else:
+                boundary_out.setdefault(u, {})[v] = None
+                boundary_in.setdefault(v, {})[u] = None
+            stack.append((u, v))
+
+    while len(flat) < 3 * face_count:
+        if not stack:
+            corners = []
+            for _ in range(3):
+                if next(symbols) == TOPOLOGY_NEW:
+                    corners.append(next_label)
+                    next_label += 1
+                else:
+                    corners.append(next(aux) - 1)
+            add_face(*corners)
+            continue
+        a, b = stack.pop()
+        if (b, a) in decoded:
+            continue
+        symbol = next(symbols)
+        if symbol == TOPOLOGY_NEW:
+            c = next_label
+            next_label += 1
+        elif symbol == TOPOLOGY_LEFT:
+            c = next(reversed(boundary_in[a]))
+        elif symbol == TOPOLOGY_RIGHT:
+            c = next(reversed(boundary_out[b]))
+        else:
+            value = next(aux)
+            if value == 0:
+                continue
+            c = value - 1
+        add_face(b, a, c)
+    return flat
+
+
+def unpack_faces_array(data: bytes):
+    """Decodes a face block into a contiguous (M,3) uint32 array, or a flat array.array('I') without NumPy."""
     if not data:
-        return []
+        return face_array([])
     flag = data[0]
     payload = data[1:]
-    if flag == FACE_UINT16:
-        return [struct.unpack('<HHH', payload[i:i + 6]) for i in range(0, len(payload), 6)]
-    if flag == FACE_UINT32:
-        return [struct.unpack('<III', payload[i:i + 12]) for i in range(0, len(payload), 12)]
+    if flag in {FACE_UINT16, FACE_UINT32}:
+        indices = decode_values(payload, '<H' if flag == FACE_UINT16 else '<I')
+        return face_array(indices)
     if flag in {FACE_DELTA_INT16, FACE_DELTA_INT32}:
-        step = 2 if flag == FACE_DELTA_INT16 else 4
-        fmt = '<h' if flag == FACE_DELTA_INT16 else '<i'
-        deltas = [struct.unpack(fmt, payload[i:i + step])[0] for i in range(0, len(payload), step)]
-        indices = []
-        prev = 0
-        for delta in deltas:
-            value = prev + delta
-            indices.append(value)
-            prev = value
-        return [tuple(indices[i:i + 3]) for i in range(0, len(indices), 3)]
+        deltas = decode_values(payload, '<h' if flag == FACE_DELTA_INT16 else '<i')
+        return face_array(prefix_sum(deltas))
     if flag == FACE_BITPACKED:
-        _, bits, flat_count = struct.unpack('<BBI', data[:6])
-        flat = _bitunpack(data[6:], bits, flat_count)
-        return [tuple(flat[i:i + 3]) for i in range(0, len(flat), 3)]
+        _, bits, flat_count = struct.unpack_from('<BBI', data)
+        return face_array(bitunpack_values(data[6:], bits, flat_count))
     if flag == FACE_DELTA_VARINT:
-        _, flat_count = struct.unpack('<BI', data[:5])
+        _, flat_count = struct.unpack_from('<BI', data)
+        if np is not None:
+            return face_array(prefix_sum(zigzag_decode_array(decode_varints_array(data[5:])[:flat_count])))
         zz = decode_varints(data[5:])
-        indices = []
-        prev = 0
-        for encoded in zz[:flat_count]:
-            value = prev + zigzag_decode(encoded)
-            indices.append(value)
-            prev = value
-        return [tuple(indices[i:i + 3]) for i in range(0, len(indices), 3)]
+        return face_array(prefix_sum([zigzag_decode(encoded) for encoded in zz[:flat_count]]))
+    if flag == FACE_TOPOLOGY:
+        _, face_count, symbol_count = TOPOLOGY_STRUCT.unpack_from(data)
+        symbol_end = TOPOLOGY_STRUCT.size + (symbol_count * 2 + 7) // 8
+        symbols = bitunpack_values(data[TOPOLOGY_STRUCT.size:symbol_end], 2, symbol_count)
+        return face_array(decode_topology_faces(face_count, symbols, decode_varints(data[symbol_end:])))
     raise ValueError(f'Unknown face packing flag: {flag}')
 
 
-def parseBbm(file_path: str, fileToView: int = 0, encryptionKey: str = None, encryptionMode: str = None):
+def unpack_faces(data: bytes):
+    return rows_as_tuples(unpack_faces_array(data))
+
+
+def readDirectoryBlock(f):
+    """Returns (flags, entry count, directory bytes) of the trailing model directory, or None when the file has none."""
+    f.seek(0, os.SEEK_END)
+    file_size = f.tell()
+    if file_size < HEADER_SIZE + DIRECTORY_HEADER_STRUCT.size + DIRECTORY_FOOTER_STRUCT.size:
+        return None
+    f.seek(file_size - DIRECTORY_FOOTER_STRUCT.size)
+    directory_offset, directory_len, magic = DIRECTORY_FOOTER_STRUCT.unpack(f.read(DIRECTORY_FOOTER_STRUCT.size))
+    if magic != DIRECTORY_FOOTER_MAGIC or directory_offset + directory_len + DIRECTORY_FOOTER_STRUCT.size != file_size:
+        return None
+    f.seek(directory_offset)
+    directory = f.read(directory_len)
+    magic, _, flags, count = DIRECTORY_HEADER_STRUCT.unpack_from(directory)
+    if magic != DIRECTORY_MAGIC or len(directory) < DIRECTORY_HEADER_STRUCT.size + count * DIRECTORY_ENTRY_STRUCT.size:
+        return None
+    return flags, count, directory
+
+
+def readDirectory(f):
+    """Returns the ModelEntry list from the trailing model directory, or None when the file has none."""
+    block = readDirectoryBlock(f)
+    if block is None:
+        return None
+    _, count, directory = block
+    entries = []
+    for index, fields in enumerate(DIRECTORY_ENTRY_STRUCT.iter_unpack(directory[DIRECTORY_HEADER_STRUCT.size:DIRECTORY_HEADER_STRUCT.size + count * DIRECTORY_ENTRY_STRUCT.size])):
+        offset, length, vertex_count, face_count, compression, name = fields
+        entries.append(ModelEntry(index, name.decode('utf-8', errors='ignore').replace('\x00', ''), offset, length, vertex_count, face_count, compression))
+    return entries
+
+
+def scanHeaders(f):
+    """Builds the ModelEntry list by walking the [Header][Data] chain, reading only the headers.
+
+    Tombstoned records (replaced or deleted models) are skipped; indices count live models only.
+    """
+    f.seek(0)
+    numFiles = readHeader(f.read(HEADER_SIZE))[4]
+    entries = []
+    base = 0
+    for _ in range(max(numFiles, 1)):
+        f.seek(base)
+        name, v_count, f_count, comp, _, v_len, f_len, _ = readHeader(f.read(HEADER_SIZE))
+        if not comp & COMPRESSION_TOMBSTONE:
+            entries.append(ModelEntry(len(entries), name, base, HEADER_SIZE + v_len + f_len, v_count, f_count, comp))
+        base += HEADER_SIZE + v_len + f_len
+    return entries
+
+
+def readModelIndex(f):
+    entries = readDirectory(f)
+    return entries if entries is not None else scanHeaders(f)
+
+
+def readZstdDictionary(f):
+    """Returns the shared zstd dictionary stored after the directory entries (compression mode 8), or None."""
+    block = readDirectoryBlock(f)
+    if block is None or not block[0] & DIRECTORY_FLAG_ZSTD_DICT:
+        return None
+    _, count, directory = block
+    offset = DIRECTORY_HEADER_STRUCT.size + count * DIRECTORY_ENTRY_STRUCT.size
+    if len(directory) < offset + 4:
+        raise ValueError('Truncated zstd dictionary in model directory')
+    (length,) = struct.unpack_from('<I', directory, offset)
+    if len(directory) < offset + 4 + length:
+        raise ValueError('Truncated zstd dictionary in model directory')
+    return directory[offset + 4:offset + 4 + length]
+
+
+def findModel(entries, model):
+    """Looks a model up by index (int) or by name (str)."""
+    if isinstance(model, str):
+        for entry in entries:
+            if entry.name == model:
+                return entry
+        raise KeyError(f'No model named {model!r}')
+    if not 0 <= model < len(entries):
+        raise IndexError(f'Model index {model} out of range (file holds {len(entries)} models)')
+    return entries[model]
+
+
+def concat_rows(parts, empty):
+    """Joins per-chunk vertex/face arrays into one array."""
+    if not parts:
+        return empty
+    if np is not None:
+        return np.concatenate(parts)
+    out = array.array(parts[0].typecode)
+    for part in parts:
+        out.extend(part)
+    return out
+
+
+def chunk_payloads(block):
+    """Yields (element count, stored chunk data) for every chunk of a VERT_CHUNKED/FACE_CHUNKED block."""
+    _, chunk_count, _ = CHUNK_HEADER_STRUCT.unpack_from(block)
+    offset = CHUNK_HEADER_STRUCT.size + chunk_count * CHUNK_ENTRY_STRUCT.size
+    for index in range(chunk_count):
+        count, _, stored_len = CHUNK_ENTRY_STRUCT.unpack_from(block, CHUNK_HEADER_STRUCT.size + index * CHUNK_ENTRY_STRUCT.size)
+        yield count, block[offset:offset + stored_len]
+        offset += stored_len
+
+
+def iter_vertex_chunks(block, codec: int, zstd_dict: bytes = None):
+    """Streams a chunked vertex block one decoded chunk at a time (memory bounded by the chunk size)."""
+    for count, stored in chunk_payloads(block):
+        yield unpack_vertices_array(decompressor(stored, codec, zstd_dict), count)
+
+
+def iter_face_chunks(block, codec: int, zstd_dict: bytes = None):
+    for _, stored in chunk_payloads(block):
+        yield unpack_faces_array(decompressor(stored, codec, zstd_dict))
+
+
+def unpack_chunked_block(block, codec: int, workers: int = None, zstd_dict: bytes = None):
+    """Decompresses and unpacks every chunk of a chunked block on a thread pool and joins the results."""
+    is_vertex = block[0] == VERT_CHUNKED
+    if is_vertex:
+        decode_chunk = lambda chunk: unpack_vertices_array(decompressor(chunk[1], codec, zstd_dict), chunk[0])
+    else:
+        decode_chunk = lambda chunk: unpack_faces_array(decompressor(chunk[1], codec, zstd_dict))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        parts = list(executor.map(decode_chunk, chunk_payloads(block)))
+    return concat_rows(parts, vertex_array([], [], []) if is_vertex else face_array([]))
+
+
+def record_block_spans(header, offset: int, read):
+    """[(offset, length)] of a record's stored vertex and face data, following reference blocks to the data they
+    point to. header is readHeader's tuple for the record at offset; read(offset, length) returns file bytes."""
+    compression, _, vertexLen, faceLen = header[3:7]
+    spans = []
+    start = offset + HEADER_SIZE
+    for length, bit in ((vertexLen, COMPRESSION_VERTEX_REF), (faceLen, COMPRESSION_FACE_REF)):
+        spans.append(tuple(BLOCK_REFERENCE_STRUCT.unpack(read(start, length))) if compression & bit else (start, length))
+        start += length
+    return spans
+
+
+def decodeModelData(vertex_blob, face_blob, vertexCount: int, compression: int, encryptionKey: str = None, encryptionMode: str = None, zstd_dict: bytes = None):
+    """Decrypts, decompresses and unpacks one model's stored vertex/face data into arrays."""
+    compression &= COMPRESSION_CODEC_MASK | COMPRESSION_CHUNKED
+    vertex_blob = decryptor(vertex_blob, encryptionKey, encryptionMode)
+    face_blob = decryptor(face_blob, encryptionKey, encryptionMode)
+    if compression & COMPRESSION_CHUNKED:
+        codec = compression & COMPRESSION_CODEC_MASK
+        return unpack_chunked_block(vertex_blob, codec, zstd_dict=zstd_dict), unpack_chunked_block(face_blob, codec, zstd_dict=zstd_dict)
+    faceData = unpack_faces_array(decompressor(face_blob, compression, zstd_dict))
+    vertexData = unpack_vertices_array(decompressor(vertex_blob, compression, zstd_dict), vertexCount, faceData)
+    return vertexData, faceData
+
+
+def read_at(f, offset: int, length: int) -> bytes:
+    f.seek(offset)
+    return f.read(length)
+
+
+def readModelRecord(f, entry, encryptionKey: str = None, encryptionMode: str = None, as_arrays: bool = False, zstd_dict: bytes = None):
+    """Seeks straight to one model record and decodes it."""
+    if zstd_dict is None and entry.compression & COMPRESSION_CODEC_MASK == ZSTD_DICT_MODE:
+        zstd_dict = readZstdDictionary(f)
+    read = lambda offset, length: read_at(f, offset, length)
+    header = readHeader(read(entry.offset, HEADER_SIZE))
+    modelName, vertexCount, faceCount, compression, numFiles, vertexLen, faceLen, formatVersion = header
+    vertex_span, face_span = record_block_spans(header, entry.offset, read)
+    vertexData, faceData = decodeModelData(read(*vertex_span), read(*face_span), vertexCount, compression, encryptionKey, encryptionMode, zstd_dict)
+    print(f'Model ID: {modelName}\nFormat Tag: {formatVersion}\nVertex Count: {vertexCount}\nFace Count: {faceCount}\nCompression: {compression}')
+    print(f'Parsed {row_count(vertexData)} vertices and {row_count(faceData)} faces.')
+    if as_arrays:
+        return vertexData, faceData
+    return rows_as_tuples(vertexData), rows_as_tuples(faceData)
+
+
+def loadBbmModel(file_path: str, model=0, encryptionKey: str = None, encryptionMode: str = None, as_arrays: bool = False, cache=None):
+    """Opens one model by index or name without reading the other models in the file.
+
+    With a DecodedModelCache, repeated loads of an unchanged file return the cached (shared, read-only) arrays.
+    """
+    if cache is not None:
+        vertexData, faceData = cache.load(file_path, model, encryptionKey, encryptionMode)
+        return (vertexData, faceData) if as_arrays else (rows_as_tuples(vertexData), rows_as_tuples(faceData))
+    with open(file_path, 'rb') as f:
+        return readModelRecord(f, findModel(readModelIndex(f), model), encryptionKey, encryptionMode, as_arrays)
+
+
+def parseBbm(file_path: str, fileToView: int = 0, encryptionKey: str = None, encryptionMode: str = None, as_arrays: bool = False, cache=None):
     multipleModels.clear()
     modelNames.clear()
+    if cache is not None:
+        entries = cache.index(file_path)
+        multipleModels.extend(entries)
+        modelNames.extend(entry.name for entry in entries)
+        target = fileToView if 0 <= fileToView < len(entries) else 0
+        return loadBbmModel(file_path, target, encryptionKey, encryptionMode, as_arrays, cache)
     with open(file_path, 'rb') as f:
-        header = f.read(HEADER_SIZE)
-        modelName, vertexCount, faceCount, compression, numFiles, vertexLen, faceLen, formatVersion = readHeader(header)
-        f.seek(0)
-        target_model_data = None
-        if numFiles == 1:
-            target_model_data = f
+        entries = readModelIndex(f)
+        multipleModels.extend(entries)
+        modelNames.extend(entry.name for entry in entries)
+        target = entries[fileToView] if 0 <= fileToView < len(entries) else entries[0]
+        return readModelRecord(f, target, encryptionKey, encryptionMode, as_arrays)
+
+
+SIDECAR_MAGIC = b'BBMC'
+SIDECAR_VERSION = 2
+SIDECAR_HEADER_STRUCT = struct.Struct('<4sIQqQQ')
+CACHE_INDEX_FILES = 64
+
+
+def array_nbytes(values) -> int:
+    return values.nbytes if np is not None and isinstance(values, np.ndarray) else len(values) * values.itemsize
+
+
+def write_sidecar(path: str, vertexData, faceData, source=(0, 0)):
+    """Writes decoded arrays as [BBMC][version][source size][source mtime (ns)][vertex count][face count][float32 xyz...]
+    [uint32 faces...] (little-endian), replacing any existing file atomically. source is the (size, mtime_ns) of the
+    .bbm file the arrays were decoded from."""
+    if np is not None:
+        payload = [np.ascontiguousarray(vertexData, dtype='<f4').tobytes(), np.ascontiguousarray(faceData, dtype='<u4').tobytes()]
+    else:
+        payload = []
+        for values in (vertexData, faceData):
+            values = array.array(values.typecode, values)
+            if sys.byteorder == 'big':
+                values.byteswap()
+            payload.append(values.tobytes())
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(SIDECAR_HEADER_STRUCT.pack(SIDECAR_MAGIC, SIDECAR_VERSION, *source, row_count(vertexData), row_count(faceData)))
+        f.write(payload[0])
+        f.write(payload[1])
+    os.replace(temp_path, path)
+
+
+def read_sidecar(path: str, source=None):
+    """Maps a sidecar back to (vertices, faces); read-only memory-mapped arrays with NumPy, copies without.
+    Returns None when the file is missing, does not match its header or, with source, was decoded from another
+    (size, mtime_ns) version of the .bbm file."""
+    try:
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            header = f.read(SIDECAR_HEADER_STRUCT.size)
+            if len(header) < SIDECAR_HEADER_STRUCT.size:
+                return None
+            magic, version, source_size, source_mtime, vertex_count, face_count = SIDECAR_HEADER_STRUCT.unpack(header)
+            vertex_end = SIDECAR_HEADER_STRUCT.size + vertex_count * 12
+            if magic != SIDECAR_MAGIC or version != SIDECAR_VERSION or size != vertex_end + face_count * 12:
+                return None
+            if source is not None and (source_size, source_mtime) != tuple(source):
+                return None
+            if np is not None:
+                mapped = np.memmap(path, dtype=np.uint8, mode='r')
+                return (mapped[SIDECAR_HEADER_STRUCT.size:vertex_end].view('<f4').reshape(-1, 3),
+                        mapped[vertex_end:].view('<u4').reshape(-1, 3))
+            vertexData = array.array('f', f.read(vertex_count * 12))
+            faceData = array.array('I', f.read(face_count * 12))
+    except OSError:
+        return None
+    if sys.byteorder == 'big':
+        vertexData.byteswap()
+        faceData.byteswap()
+    return vertexData, faceData
+
+
+class DecodedModelCache:
+    """In-process LRU cache of decoded (vertices, faces) arrays with a byte budget, plus an optional sidecar directory.
+
+    Entries are keyed by (path, size, mtime, model index, key fingerprint), so rewriting a .bbm file or changing the
+    key misses. In files with reference blocks the model index is replaced by the resolved vertex/face data
+    locations, so deduplicated models share one decoded copy. Cached NumPy arrays are shared between callers and
+    marked read-only. With sidecar_dir, decoded models are also written there and memory-mapped back on a miss
+    (e.g. after a restart) without decompressing; encrypted models never go to the sidecar, which would store them
+    decrypted. A sidecar is named after (path, model index) and records the size and mtime of the file it was
+    decoded from, so a rewritten .bbm file replaces its sidecars instead of leaving orphans behind.
+    """
+
+    def __init__(self, max_bytes: int = 256 << 20, sidecar_dir: str = None):
+        self.max_bytes = max_bytes
+        self.sidecar_dir = sidecar_dir
+        self.current_bytes = 0
+        self.hits = self.sidecar_hits = self.misses = 0
+        self._models = collections.OrderedDict()
+        self._indexes = collections.OrderedDict()
+        self._lock = threading.Lock()
+        if sidecar_dir is not None:
+            os.makedirs(sidecar_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._models)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self._indexes.clear()
+            self.current_bytes = 0
+
+    @staticmethod
+    def file_identity(file_path: str):
+        stat = os.stat(file_path)
+        return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def key_fingerprint(encryptionKey: str = None, encryptionMode: str = None) -> str:
+        if encryptionKey is None and encryptionMode is None:
+            return ''
+        return hashlib.sha256(f'{encryptionMode}\0{encryptionKey}'.encode()).hexdigest()[:16]
+
+    def _file_index(self, identity):
+        """(entries, zstd dictionary, {model index: resolved block spans}) of a file, cached for the
+        CACHE_INDEX_FILES most recent files. The spans are only read when the file holds reference blocks."""
+        with self._lock:
+            cached = self._indexes.get(identity)
+            if cached is not None:
+                self._indexes.move_to_end(identity)
+                return cached
+        with open(identity[0], 'rb') as f:
+            entries = readModelIndex(f)
+            spans = {}
+            if any(entry.compression & (COMPRESSION_VERTEX_REF | COMPRESSION_FACE_REF) for entry in entries):
+                read = lambda offset, length: read_at(f, offset, length)
+                spans = {entry.index: tuple(record_block_spans(readHeader(read(entry.offset, HEADER_SIZE)), entry.offset, read)) for entry in entries}
+            cached = (entries, readZstdDictionary(f), spans)
+        with self._lock:
+            self._indexes[identity] = cached
+            while len(self._indexes) > CACHE_INDEX_FILES:
+                self._indexes.popitem(last=False)
+        return cached
+
+    def index(self, file_path: str):
+        return self._file_index(self.file_identity(file_path))[0]
+
+    def sidecar_path(self, file_path: str, index: int, fingerprint: str = '') -> str:
+        key = (os.path.abspath(file_path), index, fingerprint)
+        return os.path.join(self.sidecar_dir, hashlib.sha256(repr(key).encode()).hexdigest()[:32] + '.bbmc')
+
+    def get(self, key):
+        with self._lock:
+            value = self._models.get(key)
+            if value is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = sum(array_nbytes(values) for values in value)
+        if size > self.max_bytes:
+            return
+        if np is not None:
+            for values in value:
+                if isinstance(values, np.ndarray):
+                    values.flags.writeable = False
+        with self._lock:
+            previous = self._models.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= sum(array_nbytes(values) for values in previous)
+            self._models[key] = value
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._models.popitem(last=False)
+                self.current_bytes -= sum(array_nbytes(values) for values in evicted)
+
+    def load(self, file_path: str, model=0, encryptionKey: str = None, encryptionMode: str = None):
+        """Returns the decoded (vertices, faces) arrays of one model, from memory, the sidecar or the file."""
+        identity = self.file_identity(file_path)
+        entries, zstd_dict, spans = self._file_index(identity)
+        entry = findModel(entries, model)
+        key = (*identity, spans.get(entry.index, entry.index), self.key_fingerprint(encryptionKey, encryptionMode))
+        value = self.get(key)
+        if value is not None:
+            return value
+        use_sidecar = self.sidecar_dir is not None and not key[-1]
+        sidecar = self.sidecar_path(identity[0], entry.index, key[-1]) if use_sidecar else None
+        value = read_sidecar(sidecar, identity[1:]) if use_sidecar else None
+        if value is not None:
+            with self._lock:
+                self.sidecar_hits += 1
         else:
-            base = 0
-            for _ in range(numFiles):
-                f.seek(base)
-                sub_header = f.read(HEADER_SIZE)
-                name, v_count, f_count, comp, _, v_len, f_len, fmt_ver = readHeader(sub_header)
-                f.seek(base)
-                blob = f.read(HEADER_SIZE + v_len + f_len)
-                multipleModels.append(io.BytesIO(blob))
-                modelNames.append(name)
-                base += HEADER_SIZE + v_len + f_len
-            target_model_data = multipleModels[fileToView] if 0 <= fileToView < len(multipleModels) else multipleModels[0]
-
-        with target_model_data as stream:
-            if isinstance(stream, io.BytesIO):
-                stream.seek(0)
-            header = stream.read(HEADER_SIZE)
-            modelName, vertexCount, faceCount, compression, numFiles, vertexLen, faceLen, formatVersion = readHeader(header)
-            vertex_blob = decryptor(stream.read(vertexLen), encryptionKey, encryptionMode)
-            face_blob = decryptor(stream.read(faceLen), encryptionKey, encryptionMode)
-            vertexData = unpack_vertices(decompressor(vertex_blob, compression), vertexCount)
-            faceData = unpack_faces(decompressor(face_blob, compression))
-            print(f'Model ID: {modelName}\nFormat Tag: {formatVersion}\nVertex Count: {vertexCount}\nFace Count: {faceCount}\nCompression: {compression}')
-            print(f'Parsed {len(vertexData)} vertices and {len(faceData)} faces.')
+            with self._lock:
+                self.misses += 1
+            with open(file_path, 'rb') as f:
+                value = readModelRecord(f, entry, encryptionKey, encryptionMode, True, zstd_dict)
+            if use_sidecar:
+                write_sidecar(sidecar, *value, source=identity[1:])
+        self.put(key, value)
+        return value
+
+
+class BbmReader:
+    """Memory-maps a .bbm file and serves individual models out of the mapping.
+
+    Header and payload accessors return memoryviews into the page cache. Models stored with
+    compression mode 0 and no encryption are decoded straight from the mapping; arrays that can
+    alias the payload (uint32 faces, legacy float32 vertices) stay valid after close() but keep
+    the mapping alive until they are released.
+    """
+
+    def __init__(self, file_path: str, encryptionKey: str = None, encryptionMode: str = None):
+        self.file_path = file_path
+        self.encryptionKey = encryptionKey
+        self.encryptionMode = encryptionMode
+        self._file = open(file_path, 'rb')
+        try:
+            self.entries = readModelIndex(self._file)
+            self.zstd_dict = readZstdDictionary(self._file)
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        self._view = memoryview(self._map)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def close(self):
+        if self._view is None:
+            return
+        self._view.release()
+        self._view = None
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # decoded arrays still alias the mapping; it is unmapped once they are released
+        self._file.close()
+
+    @property
+    def names(self):
+        return [entry.name for entry in self.entries]
+
+    def entry(self, model=0):
+        return findModel(self.entries, model)
+
+    def header(self, model=0) -> memoryview:
+        entry = self.entry(model)
+        return self._view[entry.offset:entry.offset + HEADER_SIZE]
+
+    def readHeader(self, model=0):
+        return readHeader(self.header(model))
+
+    def payloads(self, model=0):
+        """Returns (vertex_data, face_data) memoryviews exactly as stored (compressed/encrypted); reference blocks
+        resolve to the data they point to, so deduplicated models share the same pages."""
+        entry = self.entry(model)
+        spans = record_block_spans(readHeader(self.header(entry.index)), entry.offset, lambda offset, length: self._view[offset:offset + length])
+        return tuple(self._view[offset:offset + length] for offset, length in spans)
+
+    def vertex_payload(self, model=0) -> memoryview:
+        return self.payloads(model)[0]
+
+    def face_payload(self, model=0) -> memoryview:
+        return self.payloads(model)[1]
+
+    def decode(self, model=0, as_arrays: bool = True):
+        entry = self.entry(model)
+        vertexCount, _, compression = readHeader(self.header(entry.index))[1:4]
+        vertex_payload, face_payload = self.payloads(entry.index)
+        vertexData, faceData = decodeModelData(vertex_payload, face_payload, vertexCount, compression, self.encryptionKey, self.encryptionMode, self.zstd_dict)
+        if as_arrays:
             return vertexData, faceData
+        return rows_as_tuples(vertexData), rows_as_tuples(faceData)
+
+    def iter_vertex_chunks(self, model=0):
+        """Streams a chunked model's vertices chunk by chunk straight out of the mapping."""
+        return self._iter_chunks(model, 0, iter_vertex_chunks)
+
+    def iter_face_chunks(self, model=0):
+        return self._iter_chunks(model, 1, iter_face_chunks)
+
+    def _iter_chunks(self, model, block_index, iterate):
+        entry = self.entry(model)
+        compression = readHeader(self.header(entry.index))[3]
+        if not compression & COMPRESSION_CHUNKED:
+            raise ValueError(f'Model {entry.name!r} is not stored in chunks')
+        block = decryptor(self.payloads(entry.index)[block_index], self.encryptionKey, self.encryptionMode)
+        return iterate(block, compression & COMPRESSION_CODEC_MASK, self.zstd_dict)
 
 
 def renderBbmModel(file_path, fileToView: int = 0, encryptionKey: str = None, encryptionMode: str = None):
+    from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+    import matplotlib.pyplot as plt
     vertices, faces = parseBbm(file_path, fileToView, encryptionKey, encryptionMode)
     fig = plt.figure(figsize=(10, 7))
     ax = fig.add_subplot(111, projection='3d')